@@ -4,9 +4,24 @@ Read Growth Hormone AJCH Excel file, sum consumption by drug, convert to patient
 Uses same vials-per-patient defaults as medication_calculator.py.
 """
 
+import re
+
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    import python_calamine  # noqa: F401
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
 # Match medication_calculator defaults (pens/cartridges per patient per month)
 # Ngenla: 1 pen = 1 month; rest: 2 pens or cartridges per month
 VIALS_PER_PATIENT_MONTH = {
@@ -20,32 +35,135 @@ VIALS_PER_PATIENT_MONTH = {
     "Zomacton (Ferring)": 2.0,
 }
 
-# Map Excel "Item Description" substrings to canonical drug name
-ITEM_TO_DRUG = [
-    ("GENOTROPIN", "Genotropin (Pfizer)"),
-    ("Genotropin", "Genotropin (Pfizer)"),
-    ("SAIZEN", "Saizen (Merck Serono)"),
-    ("Saizen", "Saizen (Merck Serono)"),
-    ("NGENLA", "Ngenla (Pfizer)"),
-    ("Ngenla", "Ngenla (Pfizer)"),
-    ("OMNITROPE", "Omnitrope (Sandoz)"),
-    ("Omnitrope", "Omnitrope (Sandoz)"),
-    ("NORDITROPIN", "Norditropin (Novo Nordisk)"),
-    ("Norditropin", "Norditropin (Novo Nordisk)"),
-    ("NUTROPIN", "Nutropin (Genentech)"),
-    ("Humatrope", "Humatrope (Eli Lilly)"),
-    ("Zomacton", "Zomacton (Ferring)"),
-]
+# Map Excel "Item Description" keywords (matched case-insensitively) to canonical drug name
+ITEM_TO_DRUG = {
+    "GENOTROPIN": "Genotropin (Pfizer)",
+    "SAIZEN": "Saizen (Merck Serono)",
+    "NGENLA": "Ngenla (Pfizer)",
+    "OMNITROPE": "Omnitrope (Sandoz)",
+    "NORDITROPIN": "Norditropin (Novo Nordisk)",
+    "NUTROPIN": "Nutropin (Genentech)",
+    "HUMATROPE": "Humatrope (Eli Lilly)",
+    "ZOMACTON": "Zomacton (Ferring)",
+}
+
+# Single precompiled alternation over all keywords: one regex pass per description / column
+_ITEM_PATTERN = "(" + "|".join(map(re.escape, ITEM_TO_DRUG)) + ")"
+_ITEM_RE = re.compile(_ITEM_PATTERN, re.IGNORECASE)
+
+# Aho–Corasick automaton over the same keywords (one linear scan per description)
+_ITEM_AUTOMATON = None
+if HAS_AHOCORASICK:
+    _ITEM_AUTOMATON = ahocorasick.Automaton()
+    for _keyword, _drug in ITEM_TO_DRUG.items():
+        _ITEM_AUTOMATON.add_word(_keyword, _drug)
+    _ITEM_AUTOMATON.make_automaton()
 
 
 def map_item_to_drug(desc: str) -> str | None:
     if pd.isna(desc) or not str(desc).strip():
         return None
     s = str(desc).strip()
-    for keyword, drug in ITEM_TO_DRUG:
-        if keyword in s:
-            return drug
-    return None
+    if _ITEM_AUTOMATON is not None:
+        hit = next(_ITEM_AUTOMATON.iter(s.upper()), None)
+        return hit[1] if hit else None
+    m = _ITEM_RE.search(s)
+    return ITEM_TO_DRUG[m.group(0).upper()] if m else None
+
+
+def map_items_to_drugs(items: pd.Series) -> pd.Series:
+    """Map a whole Item Description column to drugs in one pass (NaN where no drug matches)."""
+    s = items.astype("string").str.upper().str.strip()
+    # Exports repeat the same SKU description across many rows: match each distinct value once
+    uniq = pd.Series(s.dropna().unique(), dtype="string")
+    if _ITEM_AUTOMATON is not None:
+        drugs = uniq.map(map_item_to_drug)
+    else:
+        drugs = uniq.str.extract(_ITEM_RE, expand=False).map(ITEM_TO_DRUG)
+    return s.map(dict(zip(uniq, drugs)))
+
+
+def find_item_qty_columns(columns: list[str]) -> tuple[str | None, str | None]:
+    """Return (item_col, qty_col) from the header names; the last matching column wins."""
+    cols = pd.Index(columns, dtype=object)
+    lowered = cols.str.lower()
+    item_candidates = cols[lowered.str.contains("item|description", regex=True)]
+    qty_candidates = cols[lowered.str.contains("qty|delivered", regex=True)]
+    item_col = item_candidates[-1] if len(item_candidates) else None
+    qty_col = qty_candidates[-1] if len(qty_candidates) else None
+    return item_col, qty_col
+
+
+def load_item_qty(path: Path) -> pd.DataFrame | None:
+    """
+    Read the first sheet and keep only the Item Description and Qty Delivered columns.
+    Uses the (much faster) calamine engine when installed, otherwise streams the sheet
+    with openpyxl in read-only mode. Returns None if either column is missing.
+    """
+    if HAS_CALAMINE:
+        df = pd.read_excel(path, sheet_name=0, header=0, engine="calamine")
+        df.columns = [str(c).strip() for c in df.columns]
+        item_col, qty_col = find_item_qty_columns(list(df.columns))
+        if not item_col or not qty_col:
+            return None
+        return df[[item_col, qty_col]]
+
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        columns = [str(c).strip() for c in header]
+        item_col, qty_col = find_item_qty_columns(columns)
+        if not item_col or not qty_col:
+            return None
+        item_idx, qty_idx = columns.index(item_col), columns.index(qty_col)
+        items, qtys = [], []
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            items.append(row[item_idx] if item_idx < len(row) else None)
+            qtys.append(row[qty_idx] if qty_idx < len(row) else None)
+    finally:
+        wb.close()
+    return pd.DataFrame({item_col: items, qty_col: qtys})
+
+
+def load_item_qty_cached(path: Path) -> pd.DataFrame | None:
+    """
+    load_item_qty with a Parquet sidecar (same name, .parquet) next to the workbook.
+    The sidecar is reused while it is newer than the xlsx; caching is best-effort
+    and silently skipped when pyarrow is missing or the directory is read-only.
+    """
+    cache = path.with_suffix(".parquet")
+    if cache.exists() and cache.stat().st_mtime >= path.stat().st_mtime:
+        try:
+            return pd.read_parquet(cache)
+        except (ImportError, OSError, ValueError):
+            pass
+    df = load_item_qty(path)
+    if df is None:
+        return None
+    item_col, qty_col = df.columns
+    # Normalize mixed-type cells so the frame has a stable Arrow schema
+    df[item_col] = df[item_col].astype("string")
+    df[qty_col] = pd.to_numeric(df[qty_col], errors="coerce")
+    try:
+        df.to_parquet(cache, index=False)
+    except (ImportError, OSError, ValueError):
+        pass
+    return df
+
+
+def vials_to_patients(vials: np.ndarray, vpp: np.ndarray, months: float) -> np.ndarray:
+    """Patient-equivalents per row: vials / (vpp × months); 0 where months or vpp is not positive."""
+    vials = np.asarray(vials, dtype=np.float64)
+    vpp = np.asarray(vpp, dtype=np.float64)
+    if months <= 0:
+        return np.zeros_like(vials)
+    denom = vpp * months
+    out = np.zeros_like(vials)
+    np.divide(vials, denom, out=out, where=denom > 0)
+    return out
 
 
 def main(filepath: str, months: float = 6.0):
@@ -54,26 +172,25 @@ def main(filepath: str, months: float = 6.0):
         print(f"File not found: {filepath}")
         return
 
-    df = pd.read_excel(path, sheet_name=0, header=0)
-    df.columns = [str(c).strip() for c in df.columns]
-
-    item_col = None
-    qty_col = None
-    for c in df.columns:
-        if "item" in c.lower() or "description" in c.lower():
-            item_col = c
-        if "qty" in c.lower() or "delivered" in c.lower():
-            qty_col = c
-    if not item_col or not qty_col:
+    df = load_item_qty_cached(path)
+    if df is None:
         print("Could not find Item Description and Qty Delivered columns.")
         return
+    item_col, qty_col = df.columns
 
-    df["_drug"] = df[item_col].apply(map_item_to_drug)
+    # Closed set of canonical drugs: integer-coded categorical keys make the groupby cheap
+    df["_drug"] = pd.Categorical(map_items_to_drugs(df[item_col]), categories=list(VIALS_PER_PATIENT_MONTH))
     df = df.dropna(subset=["_drug"])
-    df[qty_col] = pd.to_numeric(df[qty_col], errors="coerce").fillna(0)
+    # Quantities are whole box counts: downcast to the smallest integer dtype when they all are
+    df[qty_col] = pd.to_numeric(pd.to_numeric(df[qty_col], errors="coerce").fillna(0), downcast="integer")
 
-    totals = df.groupby("_drug", as_index=False).agg({qty_col: "sum"})
+    totals = df.groupby("_drug", observed=True, as_index=False)[qty_col].sum()
     totals.columns = ["Drug", "Total vials"]
+    totals["Drug"] = totals["Drug"].astype(str)
+    totals["vpp"] = totals["Drug"].map(VIALS_PER_PATIENT_MONTH).fillna(1.0)
+    totals["patients"] = vials_to_patients(totals["Total vials"].to_numpy(np.float64), totals["vpp"].to_numpy(np.float64), months)
+    total_vials_all = totals["Total vials"].sum()
+    total_patients_all = totals["patients"].sum()
 
     print("=" * 60)
     print("Growth Hormone — AJCH 07 to 12 - 2025")
@@ -81,19 +198,10 @@ def main(filepath: str, months: float = 6.0):
     print(f"Period: {months} months")
     print()
 
-    total_vials_all = 0
-    total_patients_all = 0.0
-
     print(f"{'Drug':<30} {'Total vials':>12} {'Vials/pat/mo':>12} {'Patients':>10}")
     print("-" * 66)
 
-    for _, row in totals.iterrows():
-        drug = row["Drug"]
-        vials = row["Total vials"]
-        vpp = VIALS_PER_PATIENT_MONTH.get(drug, 1.0)
-        patients = vials / (vpp * months) if months > 0 and vpp > 0 else 0
-        total_vials_all += vials
-        total_patients_all += patients
+    for drug, vials, vpp, patients in totals.itertuples(index=False):
         print(f"{drug:<30} {vials:>12.0f} {vpp:>12.1f} {patients:>10.1f}")
 
     print("-" * 66)
@@ -3,13 +3,21 @@ Live Drug Comparison Dashboard — McKinsey Elite Style
 All styling is in mckinsey_style.py so any new hospital dashboard can import the same setup.
 """
 
+import functools
+import hashlib
+import io
+import zipfile
+
 import streamlit as st
+import numpy as np
+import openpyxl
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from pathlib import Path
 
 from drug_comparison import (
+    EXCEL_ENGINE,
     parse_american_hospital_excel,
     parse_details_sheet,
     compare_drugs,
@@ -55,6 +63,252 @@ HOSPITALS = [
 
 CUSTOM_UPLOAD_LABEL = "Custom upload (choose files in sidebar)"
 
+
+def _source_key(source: str | bytes) -> str:
+    """Cache key for an Excel source: path + mtime for files on disk, content digest for uploads."""
+    if isinstance(source, bytes):
+        return "upload:" + hashlib.blake2b(source, digest_size=16).hexdigest()
+    return f"{source}@{Path(source).stat().st_mtime}"
+
+
+def _excel_source(source: str | bytes) -> str | io.BytesIO:
+    """Paths pass through; uploaded bytes get a fresh in-memory file per read (no temp files)."""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def _downcast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Store whole-number metric columns as the smallest integer dtype (columns with NaN or fractions stay float)."""
+    for c in df.columns:
+        if pd.api.types.is_float_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], downcast="integer")
+    return df
+
+
+# Cached loaders: keyed on _source_key so reruns (theme toggle, tab switches) skip Excel parsing.
+# Underscore-prefixed arguments are not hashed by Streamlit; the key already identifies the content.
+@st.cache_data(show_spinner=False)
+def _sheet_names(key: str, _source: str | bytes) -> list[str]:
+    src = _excel_source(_source)
+    if not zipfile.is_zipfile(src):
+        # Legacy .xls (not a zip container): openpyxl cannot open it, so use the same engine as the parsers
+        if isinstance(src, io.BytesIO):
+            src.seek(0)
+        with pd.ExcelFile(src, engine=EXCEL_ENGINE) as xl:
+            return xl.sheet_names
+    if isinstance(src, io.BytesIO):
+        src.seek(0)
+    # Read-only openpyxl only reads the workbook index, no cell parsing
+    wb = openpyxl.load_workbook(src, read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+@st.cache_data(show_spinner=False)
+def _load_overview(key: str, _source: str | bytes) -> pd.DataFrame:
+    return _downcast_numeric(parse_american_hospital_excel(_excel_source(_source)))
+
+
+@st.cache_data(show_spinner=False)
+def _load_details(key: str, sheet_name: str, _source: str | bytes) -> pd.DataFrame:
+    return _downcast_numeric(parse_details_sheet(_excel_source(_source), sheet_name))
+
+
+@st.cache_data(show_spinner=False)
+def _second_tab_sheet_names(old_key: str, new_key: str, _old_source: str | bytes, _new_source: str | bytes) -> tuple[str | None, str | None]:
+    return get_second_tab_sheet_names(_excel_source(_old_source), _excel_source(_new_source))
+
+
+def _frame_digest(df: pd.DataFrame) -> bytes:
+    """Full content hash (values, index and column labels) used as the cache key for DataFrame arguments."""
+    return repr(list(df.columns)).encode() + pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _frame_digest})
+def _compare_drugs(old_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    return compare_drugs(old_df, new_df)
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _frame_digest})
+def _compare_details(old_details: pd.DataFrame, new_details: pd.DataFrame) -> pd.DataFrame:
+    return compare_details(old_details, new_details)
+
+
+@functools.lru_cache(maxsize=256)
+def short_name(d: str) -> str:
+    """Chart label for a drug: manufacturer suffix dropped, capped at 22 chars (memoized per drug name)."""
+    return d.replace("(Pfizer)", "").replace("(Novo Nordisk)", "").replace("(Merck)", "").replace("(Sandoz)", "").strip()[:22]
+
+
+def _chart_array(frame: pd.DataFrame, col) -> np.ndarray:
+    """One column as a C-contiguous float64 array with NaN → 0, ready for Plotly (no 2-D .values round trip)."""
+    return np.ascontiguousarray(frame[col].fillna(0).to_numpy(dtype=float))
+
+
+def _change_gradient_css(frame: pd.DataFrame, vmin: float = -50, vmax: float = 50) -> pd.DataFrame:
+    """
+    Same cell styles as Styler.background_gradient(cmap="RdYlGn", axis=None, vmin, vmax),
+    computed with one colormap call over the whole block instead of per cell.
+    """
+    from matplotlib import colormaps
+    from matplotlib.colors import Normalize
+
+    rgba = colormaps["RdYlGn"](Normalize(vmin=vmin, vmax=vmax)(frame.to_numpy(dtype=float)))
+    rgb = rgba[..., :3]
+    # Relative luminance decides light vs dark text (pandas' default threshold 0.408)
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    dark = linear @ np.array([0.2126, 0.7152, 0.0722]) < 0.408
+    codes = np.round(rgb * 255).astype(int)
+    css = [
+        f"background-color: #{r:02x}{g:02x}{b:02x};color: {'#f1f1f1' if d else '#000000'};"
+        for (r, g, b), d in zip(codes.reshape(-1, 3).tolist(), dark.ravel().tolist())
+    ]
+    return pd.DataFrame(np.array(css, dtype=object).reshape(frame.shape), index=frame.index, columns=frame.columns)
+
+
+def _share_pie(labels: list[str], values, colors: list[str], title: str) -> go.Figure:
+    """Donut chart of patient share (shared by the overview and details tabs)."""
+    fig = go.Figure(go.Pie(
+        labels=labels,
+        values=values,
+        hole=0.45,
+        textinfo="label+percent",
+        textposition="outside",
+        textfont=PIE_TEXTFONT,
+        hovertemplate="%{label}<br>Patients: %{value:,.0f}<br>Share: %{percent}<extra></extra>",
+        marker=dict(colors=colors, line=PIE_MARKER_LINE),
+    ))
+    fig.update_layout(
+        **PLOTLY_LAYOUT_PIE,
+        title=dict(text=title, font=CHART_TITLE_FONT, pad=PIE_TITLE_PAD),
+        height=400,
+        showlegend=True,
+    )
+    return fig
+
+
+def _column_meta(comp_df: pd.DataFrame) -> tuple[dict[str, list[str]], dict[str, str | None]]:
+    """Classify comparison columns once: kind -> ordered columns, kind -> Total column (first column if none)."""
+    col_index = {kind: [c for c in comp_df.columns if c.endswith(f"_{kind}")] for kind in ("old", "new", "change")}
+    total_cols = {kind: next((c for c in cols if "Total" in c), cols[0] if cols else None) for kind, cols in col_index.items()}
+    return col_index, total_cols
+
+
+def _metric_subplot_title(col_name: str) -> str:
+    """Short titles for Metrics comparison subplots (McKinsey style)."""
+    s = str(col_name).replace("_old", "").replace("_new", "").strip()
+    if "Total" in s and ("12" in s or "12mo" in s):
+        return "Total patients"
+    if "Newly diagnosed" in s:
+        return "Newly diagnosed"
+    if "Follow up" in s and "received" in s:
+        return "Follow up (received treatment)"
+    if "Follow up" in s:
+        return "Follow up"
+    return s[:28] if len(s) > 28 else s
+
+
+# Overview figures depend only on comp_df and the period labels (layouts are theme-independent), so reruns reuse them.
+# cache_resource hands back the same Figure objects; cache_data would unpickle (and re-validate) each one.
+@st.cache_resource(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: _frame_digest})
+def _overview_figures(comp_df: pd.DataFrame, label_old: str, label_new: str) -> dict[str, go.Figure]:
+    """Build the overview charts: "bars", "pie_old"/"pie_new", "change", "metrics" (only those with data)."""
+    col_index, total_cols = _column_meta(comp_df)
+    old_cols, new_cols = col_index["old"], col_index["new"]
+    total_old, total_new, total_change = total_cols["old"], total_cols["new"], total_cols["change"]
+    drugs = comp_df.index.tolist()
+    figs = {}
+
+    # Chart-ready arrays, built once and shared by every overview figure
+    short_labels = [short_name(str(d)) for d in drugs]
+    y_old = _chart_array(comp_df, total_old) if total_old else None
+    y_new = _chart_array(comp_df, total_new) if total_new else None
+
+    if total_old and total_new:
+        fig1 = go.Figure()
+        fig1.add_trace(go.Bar(
+            name=f"{label_old} (12 mo)", x=short_labels, y=y_old,
+            marker_color=M["teal"], marker_line_width=0,
+        ))
+        fig1.add_trace(go.Bar(
+            name=f"{label_new} (6 mo)", x=short_labels, y=y_new,
+            marker_color=M["navy"], marker_line_width=0,
+        ))
+        fig1.update_layout(
+            **PLOTLY_LAYOUT,
+            barmode="group", bargap=0.15, bargroupgap=0.05,
+            title=dict(text="Total patients by drug — prior vs current period", font=CHART_TITLE_FONT),
+            xaxis_tickangle=-40, height=420,
+        )
+        figs["bars"] = fig1
+
+        drug_colors = [PIE_PALETTE[i % len(PIE_PALETTE)] for i in range(len(drugs))]
+        figs["pie_old"] = _share_pie(short_labels, y_old, drug_colors, f"{label_old} — Market share (12 mo)")
+        figs["pie_new"] = _share_pie(short_labels, y_new, drug_colors, f"{label_new} — Market share (6 mo)")
+
+    if total_change:
+        change_data = _chart_array(comp_df, total_change)
+        colors = [M["increase"] if v >= 0 else M["decrease"] for v in change_data]
+        fig2 = go.Figure(go.Bar(
+            y=short_labels,
+            x=change_data,
+            orientation="h",
+            marker_color=colors,
+            marker_line_width=0,
+            text=[f"{v:+.0f}" for v in change_data],
+            textposition="outside",
+            textfont={"size": 11, "color": M["navy"]},
+        ))
+        fig2.add_vline(x=0, line_dash="solid", line_color=M["charcoal"], line_width=1.2)
+        fig2.update_layout(
+            **PLOTLY_LAYOUT,
+            title=dict(text="Δ Total patients by drug", font=CHART_TITLE_FONT),
+            height=400,
+        )
+        fig2.update_xaxes(title_text="Change (current − prior)", title_font=dict(color=M["navy"], size=FONT_SIZE_BODY))
+        figs["change"] = fig2
+
+    metric_pairs = list(zip(old_cols[:4], new_cols[:4]))[:4]
+    if metric_pairs:
+        fig3 = make_subplots(
+            rows=2, cols=2,
+            subplot_titles=[_metric_subplot_title(oc) for oc, _ in metric_pairs],
+            vertical_spacing=0.18, horizontal_spacing=0.12,
+        )
+        for idx, (oc, nc) in enumerate(metric_pairs):
+            row, col = idx // 2 + 1, idx % 2 + 1
+            show_legend = (idx == 0)
+            fig3.add_trace(
+                go.Bar(name=label_old, x=short_labels, y=_chart_array(comp_df, oc),
+                       marker_color=M["teal"], marker_line_width=0,
+                       showlegend=show_legend),
+                row=row, col=col,
+            )
+            fig3.add_trace(
+                go.Bar(name=label_new, x=short_labels, y=_chart_array(comp_df, nc),
+                       marker_color=M["navy"], marker_line_width=0,
+                       showlegend=show_legend),
+                row=row, col=col,
+            )
+        fig3.update_layout(
+            **PLOTLY_LAYOUT,
+            height=600,
+            title=dict(text="Metrics comparison", font=CHART_TITLE_FONT),
+            showlegend=True,
+        )
+        fig3.update_annotations(font=CHART_TITLE_FONT)
+        fig3.update_xaxes(tickangle=-40, tickfont={"size": 9, "color": M["navy"]})
+        fig3.update_yaxes(tickfont={"size": 9, "color": M["navy"]})
+        figs["metrics"] = fig3
+    return figs
+
+
+@st.cache_data(show_spinner=False)
+def _details_sheet_common(old_key: str, new_key: str, _old_source: str | bytes, _new_source: str | bytes) -> tuple[str | None, str | None]:
+    return get_details_sheet_common(_excel_source(_old_source), _excel_source(_new_source))
+
+
 st.set_page_config(page_title="Drug Comparison | GHD Analysis", page_icon="▣", layout="wide", initial_sidebar_state="collapsed")
 
 # Theme: persist in session state, toggle button in header
@@ -87,9 +341,9 @@ selected = st.selectbox(
 )
 # Caption will show selected hospital labels after they're set below
 
-# Resolve paths and labels from selection or custom upload
-old_path = None
-new_path = None
+# Resolve sources (paths on disk, or uploaded bytes) and labels from selection or custom upload
+old_source = None
+new_source = None
 LABEL_OLD = "Old data"
 LABEL_NEW = "New data"
 
@@ -98,17 +352,13 @@ if selected == CUSTOM_UPLOAD_LABEL:
     st.sidebar.caption("Custom upload selected above.")
     old_file = st.sidebar.file_uploader("Old period Excel", type=["xlsx", "xls"])
     new_file = st.sidebar.file_uploader("New period Excel", type=["xlsx", "xls"])
-    old_path = "/tmp/old_upload.xlsx" if old_file else None
-    new_path = "/tmp/new_upload.xlsx" if new_file else None
-    if old_file:
-        with open("/tmp/old_upload.xlsx", "wb") as f:
-            f.write(old_file.getvalue())
-    if new_file:
-        with open("/tmp/new_upload.xlsx", "wb") as f:
-            f.write(new_file.getvalue())
+    old_source = old_file.getvalue() if old_file else None
+    new_source = new_file.getvalue() if new_file else None
     LABEL_OLD = "Old data"
     LABEL_NEW = "New data"
 else:
+    old_path = None
+    new_path = None
     h = next((x for x in HOSPITALS if x["name"] == selected), None)
     if h:
         old_path = h["old_path"]
@@ -125,32 +375,37 @@ else:
         if not Path(new_path).exists():
             missing.append("New")
         st.sidebar.caption(f"Missing: {', '.join(missing)}")
+    elif old_path and new_path:
+        old_source = old_path
+        new_source = new_path
 
 st.caption(f"**{LABEL_OLD}** (12 mo) vs **{LABEL_NEW}** (6 mo)")
 
-if old_path and new_path and Path(old_path).exists() and Path(new_path).exists():
+if old_source is not None and new_source is not None:
     with st.spinner("Loading both sheets..."):
-        xl_old = pd.ExcelFile(old_path)
-        xl_new = pd.ExcelFile(new_path)
-        old_df = parse_american_hospital_excel(old_path)
-        new_df = parse_american_hospital_excel(new_path)
-        comp_df = compare_drugs(old_df, new_df)
+        old_key = _source_key(old_source)
+        new_key = _source_key(new_source)
+        old_df = _load_overview(old_key, old_source)
+        new_df = _load_overview(new_key, new_source)
+        comp_df = _compare_drugs(old_df, new_df)
         # Details: compare the second tab in both files (same instructions as overview)
-        second_old, second_new = get_second_tab_sheet_names(old_path, new_path)
+        second_old, second_new = _second_tab_sheet_names(old_key, new_key, old_source, new_source)
         if second_old is not None and second_new is not None:
             has_details = True
             details_sheet_name = second_old  # for tab label
             new_details_sheet_name = second_new  # new file's details sheet for write
-            old_details = parse_details_sheet(old_path, second_old)
-            new_details = parse_details_sheet(new_path, second_new)
+            old_details = _load_details(old_key, second_old, old_source)
+            new_details = _load_details(new_key, second_new, new_source)
         else:
-            details_sheet_name_old, details_sheet_name_new = get_details_sheet_common(old_path, new_path)
+            details_sheet_name_old, details_sheet_name_new = _details_sheet_common(old_key, new_key, old_source, new_source)
             has_details = bool(details_sheet_name_old and details_sheet_name_new)
             details_sheet_name = details_sheet_name_old or details_sheet_name_new or "—"
             new_details_sheet_name = details_sheet_name_new
-            old_details = parse_details_sheet(old_path, details_sheet_name_old) if details_sheet_name_old else pd.DataFrame()
-            new_details = parse_details_sheet(new_path, details_sheet_name_new) if details_sheet_name_new else pd.DataFrame()
-        comp_details = compare_details(old_details, new_details) if has_details and not (old_details.empty and new_details.empty) else pd.DataFrame()
+            old_details = _load_details(old_key, details_sheet_name_old, old_source) if details_sheet_name_old else pd.DataFrame()
+            new_details = _load_details(new_key, details_sheet_name_new, new_source) if details_sheet_name_new else pd.DataFrame()
+        comp_details = _compare_details(old_details, new_details) if has_details and not (old_details.empty and new_details.empty) else pd.DataFrame()
+
+    _, total_cols = _column_meta(comp_df)
 
     # Summary
     st.subheader("Executive summary")
@@ -162,8 +417,7 @@ if old_path and new_path and Path(old_path).exists() and Path(new_path).exists()
     with col3:
         st.metric("Unique drugs (overview)", len(comp_df))
     with col4:
-        change_cols = [c for c in comp_df.columns if c.endswith("_change")] if not comp_df.empty else []
-        total_col = next((c for c in change_cols if "Total" in c), change_cols[0] if change_cols else None)
+        total_col = total_cols["change"]
         delta = comp_df[total_col].sum() if total_col and not comp_df.empty else 0
         st.metric("Δ Total patients (overview)", f"{delta:+.0f}")
 
@@ -172,161 +426,35 @@ if old_path and new_path and Path(old_path).exists() and Path(new_path).exists()
     details_tab_label = f"▸ Details (second tab: {details_sheet_name or '—'})" if used_second_tab else f"▸ Details ({details_sheet_name or '—'})"
     sheet_tab1, sheet_tab2 = st.tabs(["▸ Overview (Questionnaire - overview)", details_tab_label])
 
-    old_cols = [c for c in comp_df.columns if c.endswith("_old")]
-    new_cols = [c for c in comp_df.columns if c.endswith("_new")]
-    change_cols = [c for c in comp_df.columns if c.endswith("_change")]
-    total_old = next((c for c in old_cols if "Total" in c), old_cols[0] if old_cols else None)
-    total_new = next((c for c in new_cols if "Total" in c), new_cols[0] if new_cols else None)
-    total_change = next((c for c in change_cols if "Total" in c), change_cols[0] if change_cols else None)
-    drugs = comp_df.index.tolist()
-
-    def short_name(d):
-        return str(d).replace("(Pfizer)", "").replace("(Novo Nordisk)", "").replace("(Merck)", "").replace("(Sandoz)", "").strip()[:22]
 
     # --- Overview tab ---
     with sheet_tab1:
         tab1, tab2, tab3, tab4 = st.tabs(["▸ Charts", "▸ Data table", f"▸ {LABEL_OLD} vs {LABEL_NEW}", "▸ Export"])
         with tab1:
             st.subheader("Visual analysis")
-            if total_old and total_new:
-                fig1 = go.Figure()
-                fig1.add_trace(go.Bar(
-                    name=f"{LABEL_OLD} (12 mo)", x=[short_name(d) for d in drugs],
-                    y=[comp_df.loc[d, total_old] if pd.notna(comp_df.loc[d, total_old]) else 0 for d in drugs],
-                    marker_color=M["teal"], marker_line_width=0,
-                ))
-                fig1.add_trace(go.Bar(
-                    name=f"{LABEL_NEW} (6 mo)", x=[short_name(d) for d in drugs],
-                    y=[comp_df.loc[d, total_new] if pd.notna(comp_df.loc[d, total_new]) else 0 for d in drugs],
-                    marker_color=M["navy"], marker_line_width=0,
-                ))
-                fig1.update_layout(
-                    **PLOTLY_LAYOUT,
-                    barmode="group", bargap=0.15, bargroupgap=0.05,
-                    title=dict(text="Total patients by drug — prior vs current period", font=CHART_TITLE_FONT),
-                    xaxis_tickangle=-40, height=420,
-                )
-                st.plotly_chart(fig1, use_container_width=True)
+            figs = _overview_figures(comp_df, LABEL_OLD, LABEL_NEW)
+            if "bars" in figs:
+                st.plotly_chart(figs["bars"], use_container_width=True)
 
             # Market share pie charts (Old vs New) — McKinsey style
-            if total_old and total_new:
-                old_vals = comp_df[total_old].fillna(0)
-                new_vals = comp_df[total_new].fillna(0)
-                labels_pie = [short_name(d) for d in drugs]
-                drug_colors = [PIE_PALETTE[i % len(PIE_PALETTE)] for i in range(len(drugs))]
-                fig_pie_old = go.Figure(go.Pie(
-                    labels=labels_pie,
-                    values=old_vals.values,
-                    hole=0.45,
-                    textinfo="label+percent",
-                    textposition="outside",
-                    textfont=PIE_TEXTFONT,
-                    hovertemplate="%{label}<br>Patients: %{value:,.0f}<br>Share: %{percent}<extra></extra>",
-                    marker=dict(colors=drug_colors, line=PIE_MARKER_LINE),
-                ))
-                fig_pie_old.update_layout(
-                    **PLOTLY_LAYOUT_PIE,
-                    title=dict(text=f"{LABEL_OLD} — Market share (12 mo)", font=CHART_TITLE_FONT, pad=PIE_TITLE_PAD),
-                    height=400,
-                    showlegend=True,
-                )
-                fig_pie_new = go.Figure(go.Pie(
-                    labels=labels_pie,
-                    values=new_vals.values,
-                    hole=0.45,
-                    textinfo="label+percent",
-                    textposition="outside",
-                    textfont=PIE_TEXTFONT,
-                    hovertemplate="%{label}<br>Patients: %{value:,.0f}<br>Share: %{percent}<extra></extra>",
-                    marker=dict(colors=drug_colors, line=PIE_MARKER_LINE),
-                ))
-                fig_pie_new.update_layout(
-                    **PLOTLY_LAYOUT_PIE,
-                    title=dict(text=f"{LABEL_NEW} — Market share (6 mo)", font=CHART_TITLE_FONT, pad=PIE_TITLE_PAD),
-                    height=400,
-                    showlegend=True,
-                )
+            if "pie_old" in figs:
                 pie_c1, pie_c2 = st.columns(2)
                 with pie_c1:
-                    st.plotly_chart(fig_pie_old, use_container_width=True, key="pie_old")
+                    st.plotly_chart(figs["pie_old"], use_container_width=True, key="pie_old")
                 with pie_c2:
-                    st.plotly_chart(fig_pie_new, use_container_width=True, key="pie_new")
-
-            if total_change:
-                change_data = comp_df[total_change].fillna(0)
-                colors = [M["increase"] if v >= 0 else M["decrease"] for v in change_data]
-                fig2 = go.Figure(go.Bar(
-                    y=[short_name(d) for d in change_data.index],
-                    x=change_data.values,
-                    orientation="h",
-                    marker_color=colors,
-                    marker_line_width=0,
-                    text=[f"{v:+.0f}" for v in change_data.values],
-                    textposition="outside",
-                    textfont={"size": 11, "color": M["navy"]},
-                ))
-                fig2.add_vline(x=0, line_dash="solid", line_color=M["charcoal"], line_width=1.2)
-                fig2.update_layout(
-                    **PLOTLY_LAYOUT,
-                    title=dict(text="Δ Total patients by drug", font=CHART_TITLE_FONT),
-                    height=400,
-                )
-                fig2.update_xaxes(title_text="Change (current − prior)", title_font=dict(color=M["navy"], size=FONT_SIZE_BODY))
-                st.plotly_chart(fig2, use_container_width=True)
-            metric_pairs = list(zip(old_cols[:4], new_cols[:4]))[:4]
-            # Short titles for Metrics comparison subplots (McKinsey style)
-            def _metric_subplot_title(col_name: str) -> str:
-                s = str(col_name).replace("_old", "").replace("_new", "").strip()
-                if "Total" in s and ("12" in s or "12mo" in s):
-                    return "Total patients"
-                if "Newly diagnosed" in s:
-                    return "Newly diagnosed"
-                if "Follow up" in s and "received" in s:
-                    return "Follow up (received treatment)"
-                if "Follow up" in s:
-                    return "Follow up"
-                return s[:28] if len(s) > 28 else s
-            subplot_titles = [_metric_subplot_title(oc) for oc, _ in metric_pairs]
-            if metric_pairs:
-                fig3 = make_subplots(
-                    rows=2, cols=2,
-                    subplot_titles=subplot_titles,
-                    vertical_spacing=0.18, horizontal_spacing=0.12,
-                )
-                for idx, (oc, nc) in enumerate(metric_pairs):
-                    row, col = idx // 2 + 1, idx % 2 + 1
-                    show_legend = (idx == 0)
-                    fig3.add_trace(
-                        go.Bar(name=LABEL_OLD, x=[short_name(d) for d in drugs],
-                               y=[comp_df.loc[d, oc] if pd.notna(comp_df.loc[d, oc]) else 0 for d in drugs],
-                               marker_color=M["teal"], marker_line_width=0,
-                               showlegend=show_legend),
-                        row=row, col=col,
-                    )
-                    fig3.add_trace(
-                        go.Bar(name=LABEL_NEW, x=[short_name(d) for d in drugs],
-                               y=[comp_df.loc[d, nc] if pd.notna(comp_df.loc[d, nc]) else 0 for d in drugs],
-                               marker_color=M["navy"], marker_line_width=0,
-                               showlegend=show_legend),
-                        row=row, col=col,
-                    )
-                fig3.update_layout(
-                    **PLOTLY_LAYOUT,
-                    height=600,
-                    title=dict(text="Metrics comparison", font=CHART_TITLE_FONT),
-                    showlegend=True,
-                )
-                fig3.update_annotations(font=CHART_TITLE_FONT)
-                fig3.update_xaxes(tickangle=-40, tickfont={"size": 9, "color": M["navy"]})
-                fig3.update_yaxes(tickfont={"size": 9, "color": M["navy"]})
-                st.plotly_chart(fig3, use_container_width=True)
+                    st.plotly_chart(figs["pie_new"], use_container_width=True, key="pie_new")
+
+            if "change" in figs:
+                st.plotly_chart(figs["change"], use_container_width=True)
+            if "metrics" in figs:
+                st.plotly_chart(figs["metrics"], use_container_width=True)
 
         with tab2:
             st.subheader("Head-to-head comparison (overview)")
             change_subset = [c for c in comp_df.columns if "_change" in c]
             styled = comp_df.fillna(0).style.format("{:.0f}", na_rep="0")
             if change_subset:
-                styled = styled.background_gradient(subset=change_subset, cmap="RdYlGn", axis=None, vmin=-50, vmax=50)
+                styled = styled.apply(_change_gradient_css, axis=None, subset=change_subset)
             st.dataframe(styled, use_container_width=True, height=400)
 
         with tab3:
@@ -356,38 +484,8 @@ if old_path and new_path and Path(old_path).exists() and Path(new_path).exists()
                 if not ind_totals.empty:
                     labels_ind = [str(x)[:20] for x in ind_totals["Indication"].tolist()]
                     colors_ind = [PIE_PALETTE[i % len(PIE_PALETTE)] for i in range(len(labels_ind))]
-                    fig_pie_d_old = go.Figure(go.Pie(
-                        labels=labels_ind,
-                        values=ind_totals[total_old_d].fillna(0).values,
-                        hole=0.45,
-                        textinfo="label+percent",
-                        textposition="outside",
-                        textfont=PIE_TEXTFONT,
-                        hovertemplate="%{label}<br>Patients: %{value:,.0f}<br>Share: %{percent}<extra></extra>",
-                        marker=dict(colors=colors_ind, line=PIE_MARKER_LINE),
-                    ))
-                    fig_pie_d_old.update_layout(
-                        **PLOTLY_LAYOUT_PIE,
-                        title=dict(text=f"{LABEL_OLD} — Indication share", font=CHART_TITLE_FONT, pad=PIE_TITLE_PAD),
-                        height=400,
-                        showlegend=True,
-                    )
-                    fig_pie_d_new = go.Figure(go.Pie(
-                        labels=labels_ind,
-                        values=ind_totals[total_new_d].fillna(0).values,
-                        hole=0.45,
-                        textinfo="label+percent",
-                        textposition="outside",
-                        textfont=PIE_TEXTFONT,
-                        hovertemplate="%{label}<br>Patients: %{value:,.0f}<br>Share: %{percent}<extra></extra>",
-                        marker=dict(colors=colors_ind, line=PIE_MARKER_LINE),
-                    ))
-                    fig_pie_d_new.update_layout(
-                        **PLOTLY_LAYOUT_PIE,
-                        title=dict(text=f"{LABEL_NEW} — Indication share", font=CHART_TITLE_FONT, pad=PIE_TITLE_PAD),
-                        height=400,
-                        showlegend=True,
-                    )
+                    fig_pie_d_old = _share_pie(labels_ind, _chart_array(ind_totals, total_old_d), colors_ind, f"{LABEL_OLD} — Indication share")
+                    fig_pie_d_new = _share_pie(labels_ind, _chart_array(ind_totals, total_new_d), colors_ind, f"{LABEL_NEW} — Indication share")
                     st.subheader("Details — charts")
                     pie_d_c1, pie_d_c2 = st.columns(2)
                     with pie_d_c1:
@@ -403,7 +501,7 @@ if old_path and new_path and Path(old_path).exists() and Path(new_path).exists()
             if numeric_cols_d:
                 styled_d = styled_d.format({c: "{:.0f}" for c in numeric_cols_d}, na_rep="0")
             if change_subset_d:
-                styled_d = styled_d.background_gradient(subset=change_subset_d, cmap="RdYlGn", axis=None, vmin=-50, vmax=50)
+                styled_d = styled_d.apply(_change_gradient_css, axis=None, subset=change_subset_d)
             st.dataframe(styled_d, use_container_width=True, height=500)
             st.subheader(f"{LABEL_OLD} — details")
             old_display = old_details.fillna(0).reset_index()
@@ -431,8 +529,10 @@ if old_path and new_path and Path(old_path).exists() and Path(new_path).exists()
                 st.dataframe(new_display, use_container_width=True)
             st.download_button("Download details comparison (CSV)", comp_display.to_csv(index=False), file_name="ghd_details_comparison.csv", mime="text/csv", key="details_csv")
         else:
-            # Specific reason for no details
-            n_old, n_new = len(xl_old.sheet_names), len(xl_new.sheet_names)
+            # Specific reason for no details (sheet names are only needed here)
+            old_sheet_names = _sheet_names(old_key, old_source)
+            new_sheet_names = _sheet_names(new_key, new_source)
+            n_old, n_new = len(old_sheet_names), len(new_sheet_names)
             if not has_details:
                 if n_old < 2 and n_new < 2:
                     reason = f"Both files have only 1 tab ({LABEL_OLD}: {n_old}, {LABEL_NEW}: {n_new}). Add a second sheet in each file for details."
@@ -445,8 +545,8 @@ if old_path and new_path and Path(old_path).exists() and Path(new_path).exists()
             else:
                 reason = "Details sheet found but parsed to no rows. Ensure the second tab has a row with 'Type' and numeric data rows below."
             st.info(f"No details data: {reason}")
-            st.caption(f"**{LABEL_OLD} file sheets:** {', '.join(xl_old.sheet_names) or '—'}")
-            st.caption(f"**{LABEL_NEW} file sheets:** {', '.join(xl_new.sheet_names) or '—'}")
+            st.caption(f"**{LABEL_OLD} file sheets:** {', '.join(old_sheet_names) or '—'}")
+            st.caption(f"**{LABEL_NEW} file sheets:** {', '.join(new_sheet_names) or '—'}")
             st.caption(f"Details compare the **second tab** in each file (same layout as overview: {LABEL_OLD} vs {LABEL_NEW}, export).")
             # Fallback: show overview data so the tab is still useful
             st.subheader(f"{LABEL_OLD} (overview)")
@@ -3,14 +3,93 @@
 Compare two Excel files (old vs new) and output differences.
 """
 
+import argparse
+import numpy as np
 import pandas as pd
 import sys
 from pathlib import Path
 
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None  # pandas default (openpyxl)
+
 
 def load_excel(filepath: str, sheet: int | str = 0) -> pd.DataFrame:
-    """Load an Excel file into a DataFrame."""
-    return pd.read_excel(filepath, sheet_name=sheet)
+    """
+    Load one sheet of an Excel file into a DataFrame.
+    Uses the calamine engine when installed; otherwise pandas' default reader, which already
+    opens .xlsx files with openpyxl in read-only mode (no full workbook DOM).
+    """
+    return pd.read_excel(filepath, sheet_name=sheet, engine=EXCEL_ENGINE)
+
+
+def _key_index(df: pd.DataFrame, key_columns: list[str]) -> pd.Index:
+    """Row keys as an index, built column-wise: the column itself for one key, a MultiIndex for several."""
+    if len(key_columns) == 1:
+        return pd.Index(df[key_columns[0]], name=key_columns[0])
+    return pd.MultiIndex.from_frame(df[key_columns])
+
+
+def _shared_category_keys(df_old: pd.DataFrame, df_new: pd.DataFrame, key_columns: list[str]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Key columns of both frames, with text keys (e.g. drug names: few distinct values, many rows)
+    as categoricals over one shared category list, so equal strings get equal integer codes
+    and key hashing/matching works on codes instead of strings.
+    """
+    keys_old, keys_new = df_old[key_columns].copy(), df_new[key_columns].copy()
+    for c in key_columns:
+        if pd.api.types.is_numeric_dtype(keys_old[c]) or pd.api.types.is_numeric_dtype(keys_new[c]):
+            continue
+        categories = pd.Index(pd.concat([keys_old[c], keys_new[c]]).dropna().unique())
+        keys_old[c] = pd.Categorical(keys_old[c], categories=categories)
+        keys_new[c] = pd.Categorical(keys_new[c], categories=categories)
+    return keys_old, keys_new
+
+
+def _row_diff_mask(old_vals: pd.DataFrame, new_vals: pd.DataFrame) -> np.ndarray:
+    """
+    Boolean mask of rows where any aligned cell differs; NaN vs NaN counts as equal.
+    Columns with the same numeric/datetime dtype on both sides are pre-filtered by a 64-bit row hash
+    (equal hashes are taken as unchanged). Object columns are always compared cell by cell: hashing
+    stringifies mixed values, so 1 and "1" (or "nan" and a blank) would hash alike.
+    """
+    hashed = [j for j, (a, b) in enumerate(zip(old_vals.dtypes, new_vals.dtypes)) if a == b and a.kind in "biufcmM"]
+    exact = [j for j in range(old_vals.shape[1]) if j not in hashed]
+    mask = np.zeros(len(old_vals), dtype=bool)
+    if exact:
+        mask |= _cell_diff(old_vals.iloc[:, exact], new_vals.iloc[:, exact])
+    if hashed:
+        old_hash = pd.util.hash_pandas_object(old_vals.iloc[:, hashed], index=False).to_numpy()
+        new_hash = pd.util.hash_pandas_object(new_vals.iloc[:, hashed], index=False).to_numpy()
+        candidate = (old_hash != new_hash) & ~mask
+        if candidate.any():
+            mask[candidate] = _cell_diff(old_vals.iloc[candidate, hashed], new_vals.iloc[candidate, hashed])
+    return mask
+
+
+def _cell_diff(old_sub: pd.DataFrame, new_sub: pd.DataFrame) -> np.ndarray:
+    """Exact per-row comparison of aligned frames; NaN vs NaN counts as equal."""
+    diff = np.zeros(len(old_sub), dtype=bool)
+    # Column by column so numeric columns stay float64 (no object upcast of the whole block)
+    for j in range(old_sub.shape[1]):
+        a, b = old_sub.iloc[:, j], new_sub.iloc[:, j]
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            a = a.to_numpy(dtype=np.float64, na_value=np.nan)
+            b = b.to_numpy(dtype=np.float64, na_value=np.nan)
+            diff |= (a != b) & ~(np.isnan(a) & np.isnan(b))
+        else:
+            a, b = a.to_numpy(), b.to_numpy()
+            diff |= (a != b) & ~(pd.isna(a) & pd.isna(b))
+    return diff
+
+
+def _side_by_side(old_vals: pd.DataFrame, new_vals: pd.DataFrame, mask: np.ndarray, index=None) -> pd.DataFrame:
+    """Masked rows as <col>_old columns then <col>_new columns, built in a single DataFrame construction."""
+    data = {f"{c}_old": old_vals[c].to_numpy()[mask] for c in old_vals.columns}
+    data.update({f"{c}_new": new_vals[c].to_numpy()[mask] for c in new_vals.columns})
+    return pd.DataFrame(data, index=index)
 
 
 def compare_excel_files(
@@ -65,65 +144,47 @@ def compare_excel_files(
         
         if not common_cols:
             # No common columns - treat all overlapping rows as changed
-            changed = pd.concat(
-                [df_old_sub.add_suffix("_old"), df_new_sub.add_suffix("_new")],
-                axis=1,
-            )
+            changed = _side_by_side(df_old_sub, df_new_sub, np.ones(min_len, dtype=bool))
             unchanged = pd.DataFrame()
         else:
             # Compare only common columns, handle NaN correctly
-            old_vals = df_old_sub[common_cols].fillna("__NA__")
-            new_vals = df_new_sub[common_cols].fillna("__NA__")
-            diff_mask = (old_vals != new_vals).any(axis=1)
+            diff_mask = _row_diff_mask(df_old_sub[common_cols], df_new_sub[common_cols])
             
-            changed_old = df_old_sub.loc[diff_mask]
-            changed_new = df_new_sub.loc[diff_mask]
             unchanged = df_old_sub.loc[~diff_mask]
             # Combine for display: add suffixes (use common cols for alignment)
-            if len(changed_old) == 0:
+            if not diff_mask.any():
                 changed = pd.DataFrame()
             else:
-                changed = pd.concat(
-                    [changed_old[common_cols].add_suffix("_old").reset_index(drop=True),
-                     changed_new[common_cols].add_suffix("_new").reset_index(drop=True)],
-                    axis=1,
-                )
+                changed = _side_by_side(df_old_sub[common_cols], df_new_sub[common_cols], diff_mask)
     else:
-        # Compare by key columns
-        keys_old = set(df_old[key_columns].drop_duplicates().apply(tuple, axis=1))
-        keys_new = set(df_new[key_columns].drop_duplicates().apply(tuple, axis=1))
-        
-        added_keys = keys_new - keys_old
-        removed_keys = keys_old - keys_new
-        common_keys = keys_old & keys_new
-        
-        # Build key lookup
-        df_old["_key"] = df_old[key_columns].apply(tuple, axis=1)
-        df_new["_key"] = df_new[key_columns].apply(tuple, axis=1)
+        # Compare by key columns: index both frames on the keys and hash-join
+        key_frame_old, key_frame_new = _shared_category_keys(df_old, df_new, key_columns)
+        keys_old = _key_index(key_frame_old, key_columns)
+        keys_new = _key_index(key_frame_new, key_columns)
         
-        added = df_new[df_new["_key"].isin(added_keys)].drop(columns=["_key"])
-        removed = df_old[df_old["_key"].isin(removed_keys)].drop(columns=["_key"])
+        added = df_new[~keys_new.isin(keys_old)]
+        removed = df_old[~keys_old.isin(keys_new)]
         
-        # Find changed rows among common keys
-        changed_rows = []
-        unchanged_rows = []
+        # Align common keys by row position (a duplicated key is compared on its first occurrence)
+        first_old = np.flatnonzero(~keys_old.duplicated())
+        first_new = np.flatnonzero(~keys_new.duplicated())
+        common = keys_old[first_old].intersection(keys_new[first_new])
+        rows_old = first_old[keys_old[first_old].get_indexer(common)]
+        rows_new = first_new[keys_new[first_new].get_indexer(common)]
+        common_cols = [c for c in df_old.columns if c in df_new.columns and c not in key_columns]
+        o = df_old.iloc[rows_old][common_cols].set_axis(common)
+        n = df_new.iloc[rows_new][common_cols].set_axis(common)
         
-        for key in common_keys:
-            row_old = df_old[df_old["_key"] == key].drop(columns=["_key"])
-            row_new = df_new[df_new["_key"] == key].drop(columns=["_key"])
-            
-            compare_cols = [c for c in row_old.columns if c in row_new.columns]
-            if not row_old[compare_cols].equals(row_new[compare_cols]):
-                merged = pd.concat(
-                    [row_old.add_suffix("_old"), row_new.add_suffix("_new")],
-                    axis=1,
-                )
-                changed_rows.append(merged)
-            else:
-                unchanged_rows.append(row_old)
+        if common_cols:
+            diff_mask = _row_diff_mask(o, n)
+        else:
+            diff_mask = np.ones(len(common), dtype=bool)
         
-        changed = pd.concat(changed_rows, ignore_index=True) if changed_rows else pd.DataFrame()
-        unchanged = pd.concat(unchanged_rows, ignore_index=True) if unchanged_rows else pd.DataFrame()
+        if diff_mask.any():
+            changed = _side_by_side(o, n, diff_mask, index=common[diff_mask]).reset_index()
+        else:
+            changed = pd.DataFrame()
+        unchanged = df_old.iloc[rows_old[~diff_mask]]
     
     return {
         "added": added,
@@ -141,40 +202,99 @@ def compare_excel_files(
     }
 
 
+RESULT_SHEETS = ("added", "removed", "changed", "unchanged")
+
+
+def write_results(output_file: str, result: dict) -> None:
+    """
+    Write the non-empty Added/Removed/Changed/Unchanged sheets with xlsxwriter in
+    constant_memory mode, so each row is flushed to disk as it is written. Rows are written
+    in order by hand: pandas' to_excel fills cells column by column, which constant_memory drops.
+    """
+    import xlsxwriter
+
+    # Same datetime cell format as pandas' to_excel, so dates are not left as bare serial numbers
+    wb = xlsxwriter.Workbook(output_file, {"constant_memory": True, "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+    header_fmt = wb.add_format({"bold": True, "border": 1, "align": "center"})
+    for name in RESULT_SHEETS:
+        df = result[name]
+        if df.empty:
+            continue  # nothing to report: skip the sheet entirely
+        ws = wb.add_worksheet(name.capitalize())
+        ws.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+        # Python scalars, with missing values as blank cells
+        values = df.astype(object).where(df.notna(), None)
+        for r, row in enumerate(values.itertuples(index=False, name=None), start=1):
+            ws.write_row(r, 0, row)
+    wb.close()
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame with a stable Arrow schema: object columns mixing numbers and text (e.g. 1.5 / "x",
+    common in Excel data) become strings, which pyarrow would otherwise reject. Other columns are untouched.
+    """
+    mixed = [
+        c for c in df.columns
+        if df[c].dtype == object
+        and pd.api.types.infer_dtype(df[c], skipna=True) in ("mixed", "mixed-integer")
+    ]
+    if not mixed:
+        return df
+    df = df.copy()
+    for c in mixed:
+        df[c] = df[c].astype("string")
+    return df
+
+
+def write_results_parquet(output_prefix: str, result: dict) -> list[str]:
+    """
+    Write each non-empty result frame to <output_prefix>_<name>.parquet (zstd); returns the paths written.
+    The files are independent and pyarrow releases the GIL while encoding, so they are written in parallel.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    jobs = {f"{output_prefix}_{name}.parquet": _arrow_safe(result[name]) for name in RESULT_SHEETS if not result[name].empty}
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as ex:
+        futures = [ex.submit(df.to_parquet, path, index=False, compression="zstd") for path, df in jobs.items()]
+        for f in futures:
+            f.result()
+    return list(jobs)
+
+
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python compare_excel.py <old_file.xlsx> <new_file.xlsx> [--key ID,Name] [--sheet 0]")
-        print("\nPlace your Excel files in this directory, then run:")
-        print("  python compare_excel.py old_data.xlsx new_data.xlsx")
-        print("\nOptional: Use --key to specify columns for row matching (e.g. --key ID)")
-        sys.exit(1)
-    
-    old_file = sys.argv[1]
-    new_file = sys.argv[2]
-    key_columns = None
-    sheet = 0
+    parser = argparse.ArgumentParser(
+        description="Compare two Excel files (old vs new) and output differences.",
+        epilog="Example: python compare_excel.py old_data.xlsx new_data.xlsx --key ID",
+    )
+    parser.add_argument("old_file", help="Old Excel file")
+    parser.add_argument("new_file", help="New Excel file")
+    parser.add_argument("--key", nargs="+", help="Columns for row matching, comma- or space-separated (e.g. --key ID,Name)")
+    parser.add_argument("--sheet", default=0, help="Sheet name or index (default: 0)")
+    parser.add_argument("--no-write", action="store_true", help="Print the summary only; skip writing comparison_results.xlsx")
+    parser.add_argument("--format", choices=("xlsx", "parquet"), default="xlsx",
+                        help="Output format: one xlsx workbook (default) or one Parquet file per result (faster for large diffs)")
+    args = parser.parse_args()
     
-    # Parse optional args
-    i = 3
-    while i < len(sys.argv):
-        if sys.argv[i] == "--key" and i + 1 < len(sys.argv):
-            key_columns = [k.strip() for k in sys.argv[i + 1].split(",")]
-            i += 2
-        elif sys.argv[i] == "--sheet" and i + 1 < len(sys.argv):
-            try:
-                sheet = int(sys.argv[i + 1])
-            except ValueError:
-                sheet = sys.argv[i + 1]
-            i += 2
-        else:
-            i += 1
+    old_file = args.old_file
+    new_file = args.new_file
+    key_columns = [k.strip() for arg in args.key for k in arg.split(",") if k.strip()] if args.key else None
+    sheet = int(args.sheet) if str(args.sheet).isdigit() else args.sheet
+    if args.format == "parquet" and not args.no_write:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Error: --format parquet needs pyarrow. Run: pip install pyarrow")
+            sys.exit(1)
     
-    if not Path(old_file).exists():
-        print(f"Error: Old file not found: {old_file}")
-        sys.exit(1)
-    if not Path(new_file).exists():
-        print(f"Error: New file not found: {new_file}")
-        sys.exit(1)
+    # One stat() per input: existence check plus size for feedback before long reads
+    for label, path in (("Old", Path(old_file)), ("New", Path(new_file))):
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            print(f"Error: {label} file not found: {path}")
+            sys.exit(1)
+        print(f"{label}: {path.name} ({size / 1e6:.1f} MB)")
     
     result = compare_excel_files(old_file, new_file, key_columns=key_columns, sheet=sheet)
     
@@ -190,13 +310,17 @@ def main():
     print(f"Unchanged rows: {s['unchanged_rows']}")
     print("=" * 60)
     
-    # Save results to Excel
+    if args.no_write:
+        return
+    
+    if args.format == "parquet":
+        paths = write_results_parquet("comparison_results", result)
+        print("\nDetailed results saved to: " + (", ".join(paths) or "(no differences or rows to save)"))
+        return
+    
+    # Save results to Excel (empty results get no sheet)
     output_file = "comparison_results.xlsx"
-    with pd.ExcelWriter(output_file, engine="xlsxwriter") as writer:
-        result["added"].to_excel(writer, sheet_name="Added", index=False)
-        result["removed"].to_excel(writer, sheet_name="Removed", index=False)
-        result["changed"].to_excel(writer, sheet_name="Changed", index=False)
-        result["unchanged"].to_excel(writer, sheet_name="Unchanged", index=False)
+    write_results(output_file, result)
     
     print(f"\nDetailed results saved to: {output_file}")
     print("  - Added:   Rows that appear only in the new file")
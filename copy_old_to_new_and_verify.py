@@ -5,6 +5,7 @@ Copy Old American details to New American second sheet, then re-read and print v
 import pandas as pd
 from pathlib import Path
 from drug_comparison import (
+    EXCEL_ENGINE,
     get_second_tab_sheet_names,
     get_details_sheet_row_col_map,
     parse_details_sheet,
@@ -23,11 +24,14 @@ def main():
         print("New file not found:", NEW_PATH)
         return
 
-    so, sn = get_second_tab_sheet_names(OLD_PATH, NEW_PATH)
+    # Open the Old workbook once for both the sheet lookup and the details parse
+    xl_old = pd.ExcelFile(OLD_PATH, engine=EXCEL_ENGINE)
+    so, sn = get_second_tab_sheet_names(xl_old, NEW_PATH)
     sheet_name = sn or "Questionnaire - details"
     print("Sheet name:", sheet_name)
 
-    old_details = parse_details_sheet(OLD_PATH, so or "Questionnaire - details")
+    old_details = parse_details_sheet(xl_old, so or "Questionnaire - details")
+    xl_old.close()
     print("Old details shape:", old_details.shape)
     print("Old details sample (first row, first 3 cols):")
     if not old_details.empty:
@@ -46,12 +50,12 @@ def main():
         print("Write failed:", e)
         return
 
-    # Read one cell with openpyxl to verify write
+    # Read one cell with openpyxl to verify write (read-only: streams the sheet, no workbook DOM)
     import openpyxl
-    wb = openpyxl.load_workbook(NEW_PATH, data_only=True)
+    wb = openpyxl.load_workbook(NEW_PATH, data_only=True, read_only=True)
     ws = wb[sheet_name]
     # First data row for Genotropin (Pfizer) is Excel row 7, first metric column is B=2
-    cell_val = ws.cell(row=7, column=2).value
+    cell_val = next(ws.iter_rows(min_row=7, max_row=7, min_col=2, max_col=2, values_only=True), (None,))[0]
     print("Excel cell(7,2) after write:", cell_val)
     wb.close()
 
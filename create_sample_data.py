@@ -5,7 +5,8 @@ Run from project root: python create_sample_data.py
 Output: sample_data/old.xlsx, sample_data/new.xlsx
 """
 
-import pandas as pd
+import numpy as np
+import xlsxwriter
 from pathlib import Path
 
 SAMPLE_DIR = Path(__file__).parent / "sample_data"
@@ -27,16 +28,19 @@ DRUGS_OVERVIEW = [
 ]
 
 
-def write_overview_sheet(writer, sheet_name: str, drug_values: dict):
+# Same header look as pandas' to_excel
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center"}
+
+
+def write_overview_sheet(book, sheet_name: str, drug_values: dict):
     """drug_values: list of (drug_name, [metric1, metric2, ...]) or dict drug -> list of values."""
-    rows = [["Drug"] + OVERVIEW_METRICS]
-    for drug, values in drug_values.items():
-        rows.append([drug] + list(values))
-    df = pd.DataFrame(rows[1:], columns=rows[0])
-    df.to_excel(writer, sheet_name=sheet_name, index=False)
+    ws = book.add_worksheet(sheet_name)
+    ws.write_row(0, 0, ["Drug"] + OVERVIEW_METRICS, book.add_format(HEADER_FORMAT))
+    for r, (drug, values) in enumerate(drug_values.items(), start=1):
+        ws.write_row(r, 0, [drug, *values])
 
 
-def write_details_sheet(writer, sheet_name: str, rows_data: list):
+def write_details_sheet(book, sheet_name: str, rows_data: list):
     """rows_data: list of (type_label, metric1, metric2, ...). Section headers have type_label like 'pGHD', data rows have drug names."""
     # Header row: Type + metric names
     DETAIL_METRICS = [
@@ -44,31 +48,39 @@ def write_details_sheet(writer, sheet_name: str, rows_data: list):
         "Newly diagnosed patients received drug treatments in the last 12 months",
         "Follow up patients and received drug treatments in the last 12 months",
     ]
-    rows = [["Type"] + DETAIL_METRICS] + rows_data
-    df = pd.DataFrame(rows[1:], columns=rows[0])
-    df.to_excel(writer, sheet_name=sheet_name, index=False)
+    ws = book.add_worksheet(sheet_name)
+    ws.write_row(0, 0, ["Type"] + DETAIL_METRICS, book.add_format(HEADER_FORMAT))
+    for r, row in enumerate(rows_data, start=1):
+        ws.write_row(r, 0, row)
+
+
+# Details base values per indication section (rows: DETAIL_ROW_LABELS; columns: total, newly diagnosed, follow up)
+DETAIL_ROW_LABELS = [
+    "Total patients (UNIQUE)",
+    "Genotropin (Pfizer)",
+    "Norditropin (Novo Nordisk)",
+    "Omnitrope (Sandoz)",
+    "Saizen (Merck Serono)",
+    "Ngenla (Pfizer)",
+]
+DETAIL_SECTIONS = [
+    ("Pediatric Growth Hormone Deficiency (pGHD)", np.array([
+        [120, 30, 90], [35, 8, 27], [25, 6, 19], [20, 5, 15], [28, 7, 21], [12, 4, 8],
+    ], dtype=np.float64)),
+    ("Small for Gestational Age (SGA)", np.array([
+        [80, 15, 65], [22, 4, 18], [18, 3, 15], [15, 3, 12], [15, 3, 12], [10, 2, 8],
+    ], dtype=np.float64)),
+]
 
 
 def build_details_rows(old_period: bool):
     """Build details sheet rows: section headers (pGHD, etc.) and data rows with numbers."""
     mult = 1.0 if old_period else 0.85  # Slightly different for "new" period
     rows = []
-    # pGHD section
-    rows.append(["Pediatric Growth Hormone Deficiency (pGHD)", "", "", ""])
-    rows.append(["Total patients (UNIQUE)", 120 * mult, 30 * mult, 90 * mult])
-    rows.append(["Genotropin (Pfizer)", 35 * mult, 8 * mult, 27 * mult])
-    rows.append(["Norditropin (Novo Nordisk)", 25 * mult, 6 * mult, 19 * mult])
-    rows.append(["Omnitrope (Sandoz)", 20 * mult, 5 * mult, 15 * mult])
-    rows.append(["Saizen (Merck Serono)", 28 * mult, 7 * mult, 21 * mult])
-    rows.append(["Ngenla (Pfizer)", 12 * mult, 4 * mult, 8 * mult])
-    # SGA section
-    rows.append(["Small for Gestational Age (SGA)", "", "", ""])
-    rows.append(["Total patients (UNIQUE)", 80 * mult, 15 * mult, 65 * mult])
-    rows.append(["Genotropin (Pfizer)", 22 * mult, 4 * mult, 18 * mult])
-    rows.append(["Norditropin (Novo Nordisk)", 18 * mult, 3 * mult, 15 * mult])
-    rows.append(["Omnitrope (Sandoz)", 15 * mult, 3 * mult, 12 * mult])
-    rows.append(["Saizen (Merck Serono)", 15 * mult, 3 * mult, 12 * mult])
-    rows.append(["Ngenla (Pfizer)", 10 * mult, 2 * mult, 8 * mult])
+    for section, base in DETAIL_SECTIONS:
+        rows.append([section, "", "", ""])
+        # Scale the whole section in one multiply
+        rows.extend([label, *values] for label, values in zip(DETAIL_ROW_LABELS, (base * mult).tolist()))
     return rows
 
 
@@ -93,13 +105,14 @@ def main():
     }
     new_details = build_details_rows(old_period=False)
 
-    with pd.ExcelWriter(SAMPLE_DIR / "old.xlsx", engine="openpyxl") as w:
-        write_overview_sheet(w, "Questionnaire - overview", old_overview)
-        write_details_sheet(w, "Questionnaire - details", old_details)
+    # Rows go straight to the worksheet in order, so constant_memory can flush them as written
+    with xlsxwriter.Workbook(SAMPLE_DIR / "old.xlsx", {"constant_memory": True}) as book:
+        write_overview_sheet(book, "Questionnaire - overview", old_overview)
+        write_details_sheet(book, "Questionnaire - details", old_details)
 
-    with pd.ExcelWriter(SAMPLE_DIR / "new.xlsx", engine="openpyxl") as w:
-        write_overview_sheet(w, "Questionnaire - overview", new_overview)
-        write_details_sheet(w, "Questionnaire - details", new_details)
+    with xlsxwriter.Workbook(SAMPLE_DIR / "new.xlsx", {"constant_memory": True}) as book:
+        write_overview_sheet(book, "Questionnaire - overview", new_overview)
+        write_details_sheet(book, "Questionnaire - details", new_details)
 
     print(f"Created {SAMPLE_DIR / 'old.xlsx'} and {SAMPLE_DIR / 'new.xlsx'}")
 
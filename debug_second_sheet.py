@@ -1,31 +1,49 @@
 #!/usr/bin/env python3
 """Print raw structure of the second sheet so we can fix the parser."""
 
-import pandas as pd
+import argparse
+from itertools import islice
 from pathlib import Path
 
+from openpyxl import load_workbook
+
 NEW_PATH = "/Users/selim/Downloads/New American Hospital data.xlsx"
+PREVIEW_ROWS = 25
+
+def print_full(name):
+    """Parse the whole sheet with pandas to report the real shape and column dtypes (slow on large sheets)."""
+    import pandas as pd
+    df = pd.read_excel(NEW_PATH, sheet_name=name, header=None)
+    print(f"\nShape: {df.shape[0]} rows x {df.shape[1]} columns")
+    print("\n--- Column dtypes ---")
+    print(df.dtypes)
 
 def main():
+    parser = argparse.ArgumentParser(description="Print the first rows of the second sheet in NEW_PATH.")
+    parser.add_argument("--full", action="store_true", help="Also parse the whole sheet with pandas and print its shape and dtypes")
+    args = parser.parse_args()
+
     if not Path(NEW_PATH).exists():
         print(f"File not found: {NEW_PATH}")
         return
-    xl = pd.ExcelFile(NEW_PATH)
-    print("Sheet names:", xl.sheet_names)
-    if len(xl.sheet_names) < 2:
-        print("Only one sheet.")
-        return
-    name = xl.sheet_names[1]
-    df = pd.read_excel(NEW_PATH, sheet_name=name, header=None)
-    print(f"\nSecond sheet: '{name}'")
-    print(f"Shape: {df.shape[0]} rows x {df.shape[1]} columns")
-    print("\nFirst 25 rows (all columns), raw values:")
-    pd.set_option("display.max_columns", 20)
-    pd.set_option("display.width", 200)
-    pd.set_option("display.max_colwidth", 40)
-    print(df.head(25).to_string())
-    print("\n--- Column dtypes ---")
-    print(df.dtypes)
+    # Read-only workbook streams rows from the sheet XML; only the preview rows are parsed
+    wb = load_workbook(NEW_PATH, read_only=True, data_only=True)
+    try:
+        print("Sheet names:", wb.sheetnames)
+        if len(wb.sheetnames) < 2:
+            print("Only one sheet.")
+            return
+        name = wb.sheetnames[1]
+        ws = wb[name]
+        print(f"\nSecond sheet: '{name}'")
+        print(f"Dimensions (from sheet metadata): {ws.max_row} rows x {ws.max_column} columns")
+        print(f"\nFirst {PREVIEW_ROWS} rows (all columns), raw values:")
+        for i, row in enumerate(islice(ws.iter_rows(values_only=True), PREVIEW_ROWS)):
+            print(i, row)
+    finally:
+        wb.close()
+    if args.full:
+        print_full(name)
 
 if __name__ == "__main__":
     main()
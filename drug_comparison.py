@@ -4,17 +4,39 @@ Head-to-head drug comparison between old and new American Hospital Excel files.
 Creates comparison tables and visualizations of changes per drug.
 """
 
+import contextlib
+import functools
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
 try:
-    import matplotlib.pyplot as plt
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
     import matplotlib
+    # Charts are only ever saved to PNG: the non-interactive Agg canvas avoids loading Tk/Qt
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
     HAS_MATPLOTLIB = True
 except ImportError:
     HAS_MATPLOTLIB = False
 
+# Rust-based calamine reader is several times faster than openpyxl for xlsx parsing
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None  # pandas default (openpyxl)
+
 # Drug name normalization: map variants to canonical display names
 DRUG_ALIASES = {
     "Other. (somatrogon (NGENLA) 60mg/1.2mL PFP 1's)": "Ngenla (Pfizer)",
@@ -23,25 +45,54 @@ DRUG_ALIASES = {
     "Other": "Ngenla (Pfizer)",  # Details sheet
 }
 
-# Canonical list of GHD drugs (growth hormone deficiency medications) for calculators/forms
-GHD_DRUGS = [
-    "Genotropin (Pfizer)",
-    "Norditropin (Novo Nordisk)",
-    "Nutropin (Genentech)",
-    "Omnitrope (Sandoz)",
-    "Saizen (Merck Serono)",
-    "Humatrope (Eli Lilly)",
-    "Ngenla (Pfizer)",
-    "Zomacton (Ferring)",
-]
+# Canonical list of GHD drugs lives in ghd_constants; re-exported here for existing importers
+from ghd_constants import GHD_DRUGS  # noqa: E402,F401
+
+
+_ALIAS_LIST = list(DRUG_ALIASES.items())
+# 20-char prefixes in alias order, hoisted out of normalize_drug_name; the tuple form lets one
+# str.startswith call rule out every prefix match at once
+_ALIAS_PREFIXES = tuple(alias[:20] for alias, _ in _ALIAS_LIST)
+
+# Aho–Corasick automaton over every alias and its 20-char prefix: one linear scan per name.
+# Value per word: (word length, priority when found anywhere, priority when found at position 0);
+# priority is the alias' position in DRUG_ALIASES, so the first matching alias still wins.
+_ALIAS_AUTOMATON = None
+if HAS_AHOCORASICK:
+    _alias_words = {}
+    for _prio, (_alias, _) in reversed(list(enumerate(_ALIAS_LIST))):
+        _any, _start = _alias_words.get(_alias, (None, None))
+        _alias_words[_alias] = (_prio, _start)
+        _any, _start = _alias_words.get(_ALIAS_PREFIXES[_prio], (None, None))
+        _alias_words[_ALIAS_PREFIXES[_prio]] = (_any, _prio)
+    _ALIAS_AUTOMATON = ahocorasick.Automaton()
+    for _word, (_any, _start) in _alias_words.items():
+        _ALIAS_AUTOMATON.add_word(_word, (len(_word), _any, _start))
+    _ALIAS_AUTOMATON.make_automaton()
+
+
+def _first_alias(s: str) -> int | None:
+    """Index in DRUG_ALIASES of the first alias contained in s (or whose 20-char prefix starts s)."""
+    if _ALIAS_AUTOMATON is not None:
+        best = None
+        for end, (length, prio_any, prio_start) in _ALIAS_AUTOMATON.iter(s):
+            for prio in (prio_any, prio_start if end + 1 == length else None):
+                if prio is not None and (best is None or prio < best):
+                    best = prio
+        return best
+    any_prefix = s.startswith(_ALIAS_PREFIXES)
+    for prio, ((alias, _), prefix) in enumerate(zip(_ALIAS_LIST, _ALIAS_PREFIXES)):
+        if alias in s or (any_prefix and s.startswith(prefix)):
+            return prio
+    return None
 
 
 def normalize_drug_name(name: str) -> str | None:
     """Map drug name variants to canonical names for comparison."""
     s = str(name).strip()
-    for alias, canonical in DRUG_ALIASES.items():
-        if alias in s or s.startswith(alias[:20]):
-            return canonical
+    prio = _first_alias(s)
+    if prio is not None:
+        return _ALIAS_LIST[prio][1]
     return s if s else None
 
 
@@ -50,59 +101,57 @@ def parse_american_hospital_excel(filepath: str) -> pd.DataFrame:
     Parse American Hospital GHD Excel files (non-standard layout).
     Returns DataFrame with Drug as index and metric columns.
     """
-    df_raw = pd.read_excel(filepath, header=None)
-    
-    # Find header row (row containing "Drug")
-    header_row = None
-    drug_col_idx = None
-    for i in range(min(5, len(df_raw))):
-        for j, val in enumerate(df_raw.iloc[i]):
-            if "Drug" in str(val):
-                header_row = i
-                drug_col_idx = j
+    with _excel_file(filepath) as xl:
+        # Find header row (row containing "Drug"): only the first rows are read for the search
+        head = xl.parse(header=None, nrows=5).to_numpy(dtype=object)
+        header_row = None
+        drug_col_idx = None
+        for i in range(len(head)):
+            for j, val in enumerate(head[i].tolist()):
+                if "Drug" in str(val):
+                    header_row = i
+                    drug_col_idx = j
+                    break
+            if header_row is not None:
                 break
-        if header_row is not None:
-            break
-    
-    if header_row is None:
-        raise ValueError("Could not find header row with 'Drug'")
-    
-    # Extract headers (row after header_row may have time period - use header_row)
-    headers = df_raw.iloc[header_row].tolist()
-    
-    # Get data rows (skip Total/summary rows)
-    data_rows = []
-    for i in range(header_row + 1, len(df_raw)):
-        drug_name = df_raw.iloc[i, drug_col_idx]
-        if pd.isna(drug_name):
+
+        if header_row is None:
+            raise ValueError("Could not find header row with 'Drug'")
+
+        # Extract headers (row after header_row may have time period - use header_row)
+        headers = head[header_row].tolist()
+
+        # Data rows only: with the header rows skipped pandas infers numeric dtypes for the metric columns.
+        # Columns right of the header row (notes, side tables) are never mapped, so they are not materialized.
+        width = len(headers)
+        body = xl.parse(header=None, skiprows=header_row + 1, usecols=lambda j: j < width)
+    if drug_col_idx >= len(body.columns):
+        return pd.DataFrame()
+    # Drug column of the data rows, minus blanks and Total/summary rows
+    names = body.iloc[:, drug_col_idx].dropna().astype(str).str.strip()
+    names = names[~(names.str.contains("Total", regex=False) | names.str.contains("UNIQUE", regex=False) | names.eq(""))]
+    # Normalize each distinct name once (e.g. "Other (NGENLA)" -> "Ngenla (Pfizer)"); None = excluded alias
+    uniq = names.unique()
+    drugs = names.map(dict(zip(uniq, map(normalize_drug_name, uniq)))).dropna()
+    if drugs.empty:
+        return pd.DataFrame()
+    rows = body.loc[drugs.index]
+
+    # One to_numeric pass per metric column; unparseable cells become NaN. A column with no
+    # blank or numeric cell at all (pure text) is left out, as the per-cell parse used to do.
+    metrics = {}
+    for j, h in enumerate(headers):
+        if j == drug_col_idx:
             continue
-        drug_str = str(drug_name).strip()
-        # Skip Total/summary rows
-        if "Total" in drug_str or "UNIQUE" in drug_str or drug_str == "":
+        if j >= len(rows.columns):
+            # Header wider than every data row: the column exists but is blank
+            metrics[str(h)] = np.full(len(rows), np.nan)
             continue
-        
-        # Normalize drug names (e.g. "Other (NGENLA)" -> "Ngenla (Pfizer)")
-        canonical = normalize_drug_name(drug_str)
-        if canonical is None:
-            continue  # Excluded alias (e.g. generic "Other, please specify")
-        drug_str = canonical
-        
-        row = {"Drug": drug_str}
-        for j, h in enumerate(headers):
-            if j == drug_col_idx:
-                continue
-            val = df_raw.iloc[i, j]
-            try:
-                row[str(h)] = float(val) if pd.notna(val) else np.nan
-            except (ValueError, TypeError):
-                continue
-        data_rows.append(row)
-    
-    if not data_rows:
-        return pd.DataFrame()
-    
-    df = pd.DataFrame(data_rows).set_index("Drug")
-    return df
+        raw = rows.iloc[:, j]
+        vals = pd.to_numeric(raw, errors="coerce")
+        if (vals.notna() | raw.isna()).any():
+            metrics[str(h)] = vals.to_numpy(dtype=float)
+    return pd.DataFrame(metrics, index=pd.Index(drugs.to_numpy(), name="Drug"))
 
 
 def _normalize_sheet_name(s: str) -> str:
@@ -133,15 +182,51 @@ def get_details_sheet_name(xl: pd.ExcelFile) -> str | None:
     return None
 
 
+@functools.lru_cache(maxsize=4)
+def _workbook_bytes(path: str, mtime_ns: int) -> bytes:
+    """Raw workbook file read once per (path, mtime); only bytes are cached, so no file handle stays open."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@contextlib.contextmanager
+def _excel_file(source):
+    """
+    Workbook handle for one call, closed when the block exits. pd.ExcelFile is not thread-safe,
+    so handles are never cached or shared; paths are opened from the _workbook_bytes cache instead,
+    which also leaves the file itself free to be replaced (os.replace fails on open files on Windows).
+    An already-open pd.ExcelFile is passed through and left open for its owner.
+    """
+    if isinstance(source, pd.ExcelFile):
+        yield source
+        return
+    if isinstance(source, (str, os.PathLike)):
+        path = os.path.abspath(source)
+        source = io.BytesIO(_workbook_bytes(path, os.stat(path).st_mtime_ns))
+    xl = pd.ExcelFile(source, engine=EXCEL_ENGINE)
+    try:
+        yield xl
+    finally:
+        xl.close()
+
+
+@contextlib.contextmanager
+def _excel_pair(old_source, new_source):
+    """Open the Old and New workbooks concurrently (zip + XML parsing is mostly I/O and native code)."""
+    with contextlib.ExitStack() as stack:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            xl_old, xl_new = pool.map(lambda src: stack.enter_context(_excel_file(src)), (old_source, new_source))
+        yield xl_old, xl_new
+
+
 def get_second_tab_sheet_names(old_path: str, new_path: str) -> tuple[str | None, str | None]:
     """
     Return (old_second_sheet_name, new_second_sheet_name) when both files have at least 2 sheets.
     Use this to compare the second tab in both files with the same instructions as the overview.
     """
-    xl_old = pd.ExcelFile(old_path)
-    xl_new = pd.ExcelFile(new_path)
-    name_old = xl_old.sheet_names[1] if len(xl_old.sheet_names) >= 2 else None
-    name_new = xl_new.sheet_names[1] if len(xl_new.sheet_names) >= 2 else None
+    with _excel_pair(old_path, new_path) as (xl_old, xl_new):
+        name_old = xl_old.sheet_names[1] if len(xl_old.sheet_names) >= 2 else None
+        name_new = xl_new.sheet_names[1] if len(xl_new.sheet_names) >= 2 else None
     return (name_old, name_new)
 
 
@@ -150,9 +235,27 @@ def get_details_sheet_common(old_path: str, new_path: str) -> tuple[str | None,
     Return (sheet_name_for_old_file, sheet_name_for_new_file) for the details sheet.
     Each name is the exact string as it appears in that file, so parsing never fails on case mismatch.
     Returns (None, None) if no common details sheet is found.
+    When both arguments are paths the answer is memoized per process, keyed by (path, mtime) pairs,
+    so an edited or different file is looked up again.
     """
-    xl_old = pd.ExcelFile(old_path)
-    xl_new = pd.ExcelFile(new_path)
+    if isinstance(old_path, (str, os.PathLike)) and isinstance(new_path, (str, os.PathLike)):
+        old_abs, new_abs = os.path.abspath(old_path), os.path.abspath(new_path)
+        return _details_sheet_common_cached(
+            old_abs, os.stat(old_abs).st_mtime_ns, new_abs, os.stat(new_abs).st_mtime_ns
+        )
+    with _excel_pair(old_path, new_path) as pair:
+        return _details_sheet_common(*pair)
+
+
+@functools.lru_cache(maxsize=16)
+def _details_sheet_common_cached(old_path: str, old_mtime_ns: int, new_path: str, new_mtime_ns: int) -> tuple[str | None, str | None]:
+    """Path-keyed cache behind get_details_sheet_common; the mtimes only take part in the key."""
+    with _excel_pair(old_path, new_path) as pair:
+        return _details_sheet_common(*pair)
+
+
+def _details_sheet_common(xl_old: pd.ExcelFile, xl_new: pd.ExcelFile) -> tuple[str | None, str | None]:
+    """Match the details sheet across two open workbooks (see get_details_sheet_common)."""
     name_old = get_details_sheet_name(xl_old)
     name_new = get_details_sheet_name(xl_new)
     if name_old and name_new and name_old == name_new:
@@ -174,89 +277,90 @@ def get_details_sheet_common(old_path: str, new_path: str) -> tuple[str | None,
     return (None, None)
 
 
-def _is_numeric_cell(val) -> bool:
-    """True if value can be interpreted as a number (int or float)."""
-    if pd.isna(val):
-        return False
-    if isinstance(val, (int, float)):
-        return True
-    try:
-        float(str(val).strip())
-        return True
-    except (ValueError, TypeError):
-        return False
+def _numeric_block(block: np.ndarray) -> np.ndarray:
+    """Float copy of a 2-D object block in one to_numeric pass; cells that are not numbers become NaN."""
+    flat = pd.to_numeric(pd.Series(block.ravel(), dtype=object), errors="coerce")
+    return flat.to_numpy(dtype=float, na_value=np.nan).reshape(block.shape)
 
 
-def _looks_like_indication_section(type_str: str) -> bool:
-    """True if type_str looks like an indication section header (e.g. pGHD, SGA, Turner Syndrome), not a drug."""
-    s = type_str.strip().lower()
-    if not s:
-        return False
-    # Subheader / skip row
-    if "total patients" in s or "unique" in s:
-        return True
-    # Real section headers
-    if "growth hormone" in s and ("def" in s or "ghd" in s):
-        return True
-    if "gestational" in s or "sga" in s:
-        return True
-    if "syndrome" in s and "turner" in s:
-        return True
-    return False
+def _numeric_mask(block: np.ndarray) -> np.ndarray:
+    """Boolean mask of the cells in a 2-D object block that can be interpreted as a number."""
+    return ~np.isnan(_numeric_block(block))
 
 
+def _details_records(arr: np.ndarray, sheet_rows: list[int], indications: list, types: list, col_map: dict) -> dict:
+    """
+    Columnar details records: Indication and Type lists plus one float array per metric header,
+    read from the given sheet rows in a single block conversion (blank/text cells -> 0.0).
+    """
+    records = {"Indication": indications, "Type": types}
+    if col_map:
+        vals = np.nan_to_num(_numeric_block(arr[np.ix_(sheet_rows, list(col_map.values()))]), nan=0.0)
+        for k, h in enumerate(col_map):
+            records[h] = vals[:, k]
+    return records
 
 
-def parse_details_sheet(filepath: str, sheet_name: str = "Questionnaire - details") -> pd.DataFrame:
+# Indication section header (e.g. pGHD, SGA, Turner Syndrome) or Total/UNIQUE subheader, not a drug.
+# Lookaheads keep the two-word tests order-independent ("deficiency ... growth hormone" also counts).
+_SECTION_RE = re.compile(
+    r"total patients|unique|gestational|sga"
+    r"|^(?=.*growth hormone)(?=.*(?:def|ghd))"
+    r"|^(?=.*syndrome)(?=.*turner)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+_HEADER_KEYWORDS_RE = re.compile("type|drug|product|treatment")
+
+
+def _scan_details(arr: np.ndarray) -> tuple[int | None, int, list[str], dict, dict]:
     """
-    Parse the 'Questionnaire - details' sheet (indication × type/drug with metrics).
-    Returns DataFrame with MultiIndex (Indication, Type) and metric columns.
-    Tolerates 'Type' or 'Drug' header, flexible header row position, and multiple layout variants.
+    Single pass over the raw details grid (object ndarray, one entry per sheet cell):
+    find the header row, classify every row below it and return
+    (header_row, type_col_idx, headers, row_map, records).
+    row_map maps (Indication, Type) to the 0-based sheet row; records holds the parsed data rows
+    column by column (see _details_records), or is empty when there are none.
+    header_row is None when no header row was found.
     """
-    df_raw = pd.read_excel(filepath, sheet_name=sheet_name, header=None)
-    if df_raw.empty or len(df_raw) < 2:
-        return pd.DataFrame()
-    nrows, ncols = len(df_raw), len(df_raw.columns)
-    # Find header row: row containing "Type" or "Drug" (case-insensitive) in first columns
-    header_row = None
-    type_col_idx = 0
-    header_keywords = ("type", "drug", "product", "treatment")
-    for i in range(min(25, nrows)):
-        for j in range(min(10, ncols)):
-            cell = str(df_raw.iloc[i, j]).strip().lower()
-            if any(kw in cell for kw in header_keywords) and len(cell) < 50:
-                header_row = i
-                type_col_idx = j
-                break
-        if header_row is not None:
-            break
-    if header_row is None:
-        return pd.DataFrame()
-    headers = [str(h).strip() if pd.notna(h) else "" for h in df_raw.iloc[header_row].tolist()]
+    # Find header row: row containing "Type" or "Drug" (case-insensitive) in first columns.
+    # One string pass over the 25x10 corner; the first hit in row-major order wins.
+    top = arr[:25, :10]
+    cells = pd.Series(top.ravel(), dtype=object).astype(str).str.strip().str.lower()
+    is_header = cells.str.contains(_HEADER_KEYWORDS_RE, na=False) & (cells.str.len() < 50)
+    hits = np.flatnonzero(is_header.to_numpy(dtype=bool))
+    if not hits.size:
+        return None, 0, [], {}, {}
+    header_row, type_col_idx = (int(v) for v in divmod(int(hits[0]), top.shape[1]))
+    headers = [str(h).strip() if pd.notna(h) else "" for h in arr[header_row].tolist()]
+    # Data row test for every row at once: any of the first five metric cells is numeric
+    has_numeric_by_row = _numeric_mask(arr[:, type_col_idx + 1:type_col_idx + 6]).any(axis=1)
+    # Type column below the header as one string column: blanks and scope/time-period/label rows
+    # are dropped up front, so the stateful section walk below only visits candidate rows
+    type_col = pd.Series(arr[header_row + 1:, type_col_idx], dtype=object)
+    type_strs = type_col.astype(str).str.strip()
+    lowered = type_strs.str.lower()
+    skip_type_values = ["scope", "time period", "type", "drug", "questionnaire", ""]
+    candidate = (
+        type_col.notna()
+        & (type_strs != "")
+        & ~lowered.isin(skip_type_values)
+        & ~lowered.str.contains("time period|scope", na=False)
+    ).to_numpy(dtype=bool)
+    # Section/subheader classification for every candidate row in one regex pass
+    is_section = lowered.str.contains(_SECTION_RE, na=False).to_numpy(dtype=bool)
+    is_total = lowered.str.contains("total patients", regex=False, na=False).to_numpy(dtype=bool)
+    type_strs = type_strs.tolist()
     current_indication = None
-    rows = []
-    skip_type_values = {"scope", "time period", "type", "drug", "questionnaire", ""}
-    for i in range(header_row + 1, nrows):
-        type_val = df_raw.iloc[i, type_col_idx] if type_col_idx < ncols else np.nan
-        if pd.isna(type_val):
-            continue
-        type_str = str(type_val).strip()
-        if not type_str:
-            continue
-        if type_str.lower() in skip_type_values or "time period" in type_str.lower() or "scope" in type_str.lower():
-            continue
+    row_map = {}
+    data_rows, indications, types = [], [], []
+    for k in np.flatnonzero(candidate).tolist():
+        i = header_row + 1 + k
+        type_str = type_strs[k]
         # Data row: first metric cell is numeric, OR any metric cell in row is numeric
-        first_metric = df_raw.iloc[i, type_col_idx + 1] if type_col_idx + 1 < ncols else np.nan
-        has_numeric = _is_numeric_cell(first_metric)
-        if not has_numeric and type_col_idx + 1 < ncols:
-            for j in range(type_col_idx + 1, min(type_col_idx + 6, ncols)):
-                if _is_numeric_cell(df_raw.iloc[i, j]):
-                    has_numeric = True
-                    break
-        is_data_row = has_numeric
+        is_data_row = bool(has_numeric_by_row[i])
         # Accept drug-name rows even with all NaN metrics (sheet may be unfilled; we emit 0.0s)
         if not is_data_row and current_indication and type_str != "Total patients (UNIQUE)" and type_str != "Other, please specify":
-            if not _looks_like_indication_section(type_str):
+            if not is_section[k]:
                 is_data_row = True
         if is_data_row:
             if current_indication is None or (isinstance(current_indication, float) and pd.isna(current_indication)):
@@ -265,68 +369,92 @@ def parse_details_sheet(filepath: str, sheet_name: str = "Questionnaire - detail
             if canonical_type is None and type_str == "Other, please specify":
                 continue
             type_str = canonical_type if canonical_type else type_str
-            row = {"Indication": current_indication, "Type": type_str}
-            for j in range(type_col_idx + 1, len(headers)):
-                if j >= ncols:
-                    break
-                h = headers[j]
-                if not h:
-                    continue
-                val = df_raw.iloc[i, j]
-                try:
-                    row[h] = float(val) if pd.notna(val) else 0.0
-                except (ValueError, TypeError):
-                    row[h] = 0.0
-            rows.append(row)
+            row_map[(current_indication, type_str)] = i
+            data_rows.append(i)
+            indications.append(current_indication)
+            types.append(type_str)
         else:
             # Section header: only set indication for real sections (pGHD, SGA, Turner), not Total/UNIQUE
-            if type_str and _looks_like_indication_section(type_str) and "total patients" not in type_str.lower():
+            if is_section[k] and not is_total[k]:
                 current_indication = type_str
+    records = _details_records(arr, data_rows, indications, types, _details_col_map(headers, type_col_idx)) if data_rows else {}
+    return header_row, type_col_idx, headers, row_map, records
+
+
+def _details_col_map(headers: list[str], type_col_idx: int) -> dict:
+    """Metric header name -> 0-based column index for the columns right of the Type column."""
+    return {h: j for j, h in enumerate(headers) if j > type_col_idx and h}
+
+
+def _details_source(filepath, sheet_name) -> tuple | None:
+    """Identity of a details sheet on disk (path, mtime, sheet); None for uploads and open workbooks."""
+    if not isinstance(filepath, (str, os.PathLike)):
+        return None
+    path = os.path.abspath(filepath)
+    return (path, os.stat(path).st_mtime_ns, sheet_name)
+
+
+def parse_details_sheet(filepath: str, sheet_name: str = "Questionnaire - details") -> pd.DataFrame:
+    """
+    Parse the 'Questionnaire - details' sheet (indication × type/drug with metrics).
+    Returns DataFrame with MultiIndex (Indication, Type) and metric columns.
+    Tolerates 'Type' or 'Drug' header, flexible header row position, and multiple layout variants.
+    The sheet layout found by the scan (row_map, col_map, header_row, type_col_idx, source) is kept
+    in df.attrs so fill_details_sheet_to_excel can reuse it for the same file without re-scanning.
+    """
+    with _excel_file(filepath) as xl:
+        df_raw = xl.parse(sheet_name=sheet_name, header=None)
+    if df_raw.empty or len(df_raw) < 2:
+        return pd.DataFrame()
+    # Plain object ndarray: scalar arr[i, j] lookups skip pandas' per-call indexing overhead
+    arr = df_raw.to_numpy(dtype=object)
+    nrows, ncols = arr.shape
+    header_row, type_col_idx, headers, row_map, rows = _scan_details(arr)
+    if header_row is None:
+        return pd.DataFrame()
+    skip_type_values = {"scope", "time period", "type", "drug", "questionnaire", ""}
 
     # Fallback: if no header found or no rows, try first row as header and first column as Type
     if not rows and nrows >= 2 and ncols >= 2:
         header_row_fb = 0
         type_col_idx_fb = 0
-        headers_fb = [str(h).strip() if pd.notna(h) else "" for h in df_raw.iloc[header_row_fb].tolist()]
+        headers_fb = [str(h).strip() if pd.notna(h) else "" for h in arr[header_row_fb].tolist()]
         current_indication_fb = "Details"
+        data_rows_fb, indications_fb, types_fb = [], [], []
+        numeric_fb = _numeric_mask(arr)
+        has_any_num_by_row = numeric_fb[:, type_col_idx_fb + 1:].any(axis=1)
         for i in range(1, nrows):
-            type_val = df_raw.iloc[i, type_col_idx_fb] if type_col_idx_fb < ncols else np.nan
+            type_val = arr[i, type_col_idx_fb] if type_col_idx_fb < ncols else np.nan
             if pd.isna(type_val):
                 continue
             type_str = str(type_val).strip()
             if not type_str or type_str.lower() in skip_type_values:
                 continue
-            has_any_num = False
-            for j in range(type_col_idx_fb + 1, ncols):
-                if _is_numeric_cell(df_raw.iloc[i, j]):
-                    has_any_num = True
-                    break
-            if not has_any_num:
-                if not _is_numeric_cell(type_val) and "patients" not in type_str.lower() and not type_str.startswith("Total"):
+            if not has_any_num_by_row[i]:
+                if not numeric_fb[i, type_col_idx_fb] and "patients" not in type_str.lower() and not type_str.startswith("Total"):
                     current_indication_fb = type_str
                 continue
             canonical_type = normalize_drug_name(type_str)
             if canonical_type is None and type_str == "Other, please specify":
                 continue
             type_str = canonical_type if canonical_type else type_str
-            row = {"Indication": current_indication_fb, "Type": type_str}
-            for j in range(type_col_idx_fb + 1, len(headers_fb)):
-                if j >= ncols:
-                    break
-                h = headers_fb[j]
-                if not h:
-                    continue
-                val = df_raw.iloc[i, j]
-                try:
-                    row[h] = float(val) if pd.notna(val) else 0.0
-                except (ValueError, TypeError):
-                    row[h] = 0.0
-            rows.append(row)
+            data_rows_fb.append(i)
+            indications_fb.append(current_indication_fb)
+            types_fb.append(type_str)
+        if data_rows_fb:
+            rows = _details_records(arr, data_rows_fb, indications_fb, types_fb, _details_col_map(headers_fb, type_col_idx_fb))
 
     if not rows:
         return pd.DataFrame()
     df = pd.DataFrame(rows)
     df = df.set_index(["Indication", "Type"]).sort_index()
+    df.attrs.update(
+        row_map=row_map,
+        col_map=_details_col_map(headers, type_col_idx),
+        header_row=header_row,
+        type_col_idx=type_col_idx,
+        source=_details_source(filepath, sheet_name),
+    )
     return df
 
 
@@ -337,88 +465,30 @@ def get_details_sheet_row_col_map(
     """
     Scan the details sheet and return mappings from (Indication, Type) to Excel row index
     and from metric header name to Excel column index (0-based).
-    Uses the same parsing logic as parse_details_sheet so row/col indices match the sheet layout.
+    Uses the same scan as parse_details_sheet (_scan_details) so row/col indices match the sheet layout.
     Returns (row_map, col_map, header_row, type_col_idx).
     """
-    import openpyxl
-    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
-    if sheet_name is not None:
-        ws = wb[sheet_name]
+    if EXCEL_ENGINE == "calamine":
+        # Rust reader returns the whole grid at once; leading empty rows are kept, so indices match Excel rows
+        with _excel_file(filepath) as xl:
+            df_raw = xl.parse(sheet_name=1 if sheet_name is None else sheet_name, header=None)
     else:
-        ws = wb.worksheets[1]
-    # Build a raw grid (openpyxl is 1-based)
-    max_row = ws.max_row
-    max_col = ws.max_column or 10
-    grid = []
-    for r in range(1, max_row + 1):
-        row = []
-        for c in range(1, max_col + 1):
-            cell = ws.cell(row=r, column=c)
-            row.append(cell.value)
-        grid.append(row)
-    wb.close()
-
-    df_raw = pd.DataFrame(grid)
+        import openpyxl
+        wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet_name] if sheet_name is not None else wb.worksheets[1]
+            # Stream plain values from A1 (no Cell objects, no per-cell ws.cell() lookups)
+            grid = list(ws.iter_rows(min_row=1, min_col=1, values_only=True))
+        finally:
+            wb.close()
+        df_raw = pd.DataFrame(grid)
     if df_raw.empty or len(df_raw) < 2:
         return {}, {}, 0, 0
 
-    nrows, ncols = len(df_raw), len(df_raw.columns)
-    header_row = None
-    type_col_idx = 0
-    header_keywords = ("type", "drug", "product", "treatment")
-    for i in range(min(25, nrows)):
-        for j in range(min(10, ncols)):
-            cell = str(df_raw.iloc[i, j]).strip().lower()
-            if any(kw in cell for kw in header_keywords) and len(cell) < 50:
-                header_row = i
-                type_col_idx = j
-                break
-        if header_row is not None:
-            break
+    header_row, type_col_idx, headers, row_map, _records = _scan_details(df_raw.to_numpy(dtype=object))
     if header_row is None:
         return {}, {}, 0, 0
-
-    headers = [str(h).strip() if pd.notna(h) else "" for h in df_raw.iloc[header_row].tolist()]
-    row_map = {}
-    col_map = {}
-    for j in range(type_col_idx + 1, len(headers)):
-        h = headers[j] if j < len(headers) else ""
-        if h:
-            col_map[h] = j
-
-    current_indication = None
-    skip_type_values = {"scope", "time period", "type", "drug", "questionnaire", ""}
-    for i in range(header_row + 1, nrows):
-        type_val = df_raw.iloc[i, type_col_idx] if type_col_idx < ncols else np.nan
-        if pd.isna(type_val):
-            continue
-        type_str = str(type_val).strip()
-        if not type_str or type_str.lower() in skip_type_values or "time period" in type_str.lower() or "scope" in type_str.lower():
-            continue
-        first_metric = df_raw.iloc[i, type_col_idx + 1] if type_col_idx + 1 < ncols else np.nan
-        has_numeric = _is_numeric_cell(first_metric)
-        if not has_numeric and type_col_idx + 1 < ncols:
-            for j in range(type_col_idx + 1, min(type_col_idx + 6, ncols)):
-                if _is_numeric_cell(df_raw.iloc[i, j]):
-                    has_numeric = True
-                    break
-        is_data_row = has_numeric
-        if not is_data_row and current_indication and type_str != "Total patients (UNIQUE)" and type_str != "Other, please specify":
-            if not _looks_like_indication_section(type_str):
-                is_data_row = True
-        if is_data_row:
-            if current_indication is None or (isinstance(current_indication, float) and pd.isna(current_indication)):
-                continue
-            canonical_type = normalize_drug_name(type_str)
-            if canonical_type is None and type_str == "Other, please specify":
-                continue
-            type_key = canonical_type if canonical_type else type_str
-            row_map[(current_indication, type_key)] = i
-        else:
-            if type_str and _looks_like_indication_section(type_str) and "total patients" not in type_str.lower():
-                current_indication = type_str
-
-    return row_map, col_map, header_row, type_col_idx
+    return row_map, _details_col_map(headers, type_col_idx), header_row, type_col_idx
 
 
 # Column name mapping: Old details (12-month) -> New sheet (6-month) for copying Old to New
@@ -434,6 +504,16 @@ DETAILS_12MO_TO_6MO_COLUMNS = {
 }
 
 
+@functools.lru_cache(maxsize=None)
+def _details_6mo_name(c):
+    """6-month label for one Old details column: known headers first, then any "12 months" phrase."""
+    if c in DETAILS_12MO_TO_6MO_COLUMNS:
+        return DETAILS_12MO_TO_6MO_COLUMNS[c]
+    if isinstance(c, str) and "12 months" in c:
+        return c.replace("12 months", "6 months")
+    return c
+
+
 def details_old_to_new_columns(old_details_df: pd.DataFrame) -> pd.DataFrame:
     """
     Return a copy of old_details (12-month columns) with column names mapped to 6-month
@@ -441,44 +521,40 @@ def details_old_to_new_columns(old_details_df: pd.DataFrame) -> pd.DataFrame:
     """
     if old_details_df.empty:
         return old_details_df.copy()
-    rename_map = {}
-    for c in old_details_df.columns:
-        if c in DETAILS_12MO_TO_6MO_COLUMNS:
-            rename_map[c] = DETAILS_12MO_TO_6MO_COLUMNS[c]
-        elif isinstance(c, str) and "12 months" in c:
-            rename_map[c] = c.replace("12 months", "6 months")
-    out = old_details_df.rename(columns=rename_map)
-    return out
+    return old_details_df.rename(columns=_details_6mo_name)
 
 
 def fill_details_sheet_to_excel(
     filepath: str,
     details_df: pd.DataFrame,
     sheet_name: str | None = None,
+    atomic: bool = True,
 ) -> int:
     """
     Fill the details DataFrame into the second sheet of the Excel file.
     Matches (Indication, Type) to rows and metric column names to columns;
     writes each value into the correct cell for that drug/section.
     Returns the number of cells written.
-    Saves via a temp file then replaces the original so changes persist on disk.
+    With atomic=True (default) the workbook is serialized in memory, written to a temp file
+    and swapped in with os.replace, so a failed save never leaves a half-written file.
+    atomic=False saves straight over the original (one write, for local scratch copies).
     """
+    import io
     import openpyxl
     import tempfile
     import os
 
     if details_df.empty or not details_df.index.names or list(details_df.index.names) != ["Indication", "Type"]:
         raise ValueError("details_df must have MultiIndex (Indication, Type)")
-    row_map, col_map, _header_row, _type_col_idx = get_details_sheet_row_col_map(filepath, sheet_name)
+    attrs = details_df.attrs
+    if attrs.get("source") is not None and attrs["source"] == _details_source(filepath, sheet_name):
+        # details_df was parsed from this very sheet: reuse its layout instead of scanning again
+        row_map, col_map = attrs["row_map"], attrs["col_map"]
+    else:
+        row_map, col_map, _header_row, _type_col_idx = get_details_sheet_row_col_map(filepath, sheet_name)
     if not row_map or not col_map:
         raise ValueError("Could not find details layout in the sheet (header row with 'Type', data rows)")
 
-    wb = openpyxl.load_workbook(filepath)
-    if sheet_name is not None:
-        ws = wb[sheet_name]
-    else:
-        ws = wb.worksheets[1]
-
     # Normalize col_map keys for matching (strip)
     col_map_normalized = {str(k).strip(): v for k, v in col_map.items()}
     df_cols_stripped = [str(c).strip() for c in details_df.columns]
@@ -505,32 +581,28 @@ def fill_details_sheet_to_excel(
 
     col_map_fuzzy = {_norm(k): (k, v) for k, v in col_map.items()}
 
+    # Resolve each data column to its sheet column once; values become floats with 0 for blanks/text
+    col_targets = []
+    for pos, col_name in enumerate(details_df.columns):
+        col_stripped = str(col_name).strip()
+        if col_stripped in col_map_normalized:
+            col_targets.append((pos, col_map_normalized[col_stripped] + 1))
+        elif _norm(col_name) in col_map_fuzzy:
+            col_targets.append((pos, col_map_fuzzy[_norm(col_name)][1] + 1))
+    values = details_df.iloc[:, [pos for pos, _ in col_targets]].apply(pd.to_numeric, errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+    # Collect every write first, grouped by sheet row (1-based row -> {1-based column: value}),
+    # then touch the workbook in one pass
+    row_writes = {}
     written = 0
-    for key in details_df.index:
+    for r, key in enumerate(details_df.index):
         row_i = _row_key_for(key)
         if row_i is None:
             continue
-        row_idx_1based = row_i + 1
-        for col_name in details_df.columns:
-            col_stripped = str(col_name).strip()
-            col_idx_0 = None
-            if col_stripped in col_map_normalized:
-                col_idx_0 = col_map_normalized[col_stripped]
-            elif _norm(col_name) in col_map_fuzzy:
-                _, col_idx_0 = col_map_fuzzy[_norm(col_name)]
-            if col_idx_0 is None:
-                continue
-            col_idx_1based = col_idx_0 + 1
-            try:
-                val = details_df.loc[key, col_name]
-                if pd.isna(val):
-                    val = 0
-                else:
-                    val = float(val)
-            except (TypeError, ValueError):
-                val = 0
-            ws.cell(row=row_idx_1based, column=col_idx_1based, value=val)
-            written += 1
+        cols = row_writes.setdefault(row_i + 1, {})
+        for k, (_pos, col_idx_1based) in enumerate(col_targets):
+            cols[col_idx_1based] = float(values[r, k])
+        written += len(col_targets)
 
     if written == 0:
         keys_in_sheet = set(row_map.keys())
@@ -545,13 +617,30 @@ def fill_details_sheet_to_excel(
             f"Sample sheet rows: {sample_sheet}. Sample data rows: {sample_df}. Sample sheet cols: {sheet_cols}."
         )
 
-    # Save to temp file in same directory, then replace original (ensures persistence)
+    # Full (writable) load is needed to keep the rest of the workbook; VBA is never carried over.
+    # openpyxl parses and serializes through lxml automatically when it is installed.
+    wb = openpyxl.load_workbook(filepath, keep_vba=False, data_only=False)
+    ws = wb[sheet_name] if sheet_name is not None else wb.worksheets[1]
+    cell = ws.cell
+    for row_idx_1based, cols in row_writes.items():
+        for col_idx_1based, val in cols.items():
+            cell(row=row_idx_1based, column=col_idx_1based).value = val
+
     abs_path = os.path.abspath(filepath)
+    if not atomic:
+        if not os.access(abs_path, os.W_OK):
+            raise PermissionError(f"Cannot write to {abs_path}")
+        wb.save(abs_path)
+        return written
+
+    # Serialize once in memory, write it to a temp file in the same directory, then replace the original
+    buf = io.BytesIO()
+    wb.save(buf)
     dirpath = os.path.dirname(abs_path) or "."
     fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=dirpath)
     try:
-        os.close(fd)
-        wb.save(tmp_path)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(buf.getbuffer())
         os.replace(tmp_path, abs_path)
     except Exception:
         if os.path.exists(tmp_path):
@@ -563,6 +652,13 @@ def fill_details_sheet_to_excel(
     return written
 
 
+def _first_per_key(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per index key (reindex needs unique keys); a repeated key keeps its first non-blank value per column."""
+    if df.index.is_unique:
+        return df
+    return df.groupby(level=list(range(df.index.nlevels)), sort=False).first()
+
+
 def compare_details(old_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
     """
     Head-to-head comparison for details sheet: align by (Indication, Type), compare metrics.
@@ -585,56 +681,59 @@ def compare_details(old_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
         numeric_new = [c for c in new_df.columns if pd.api.types.is_numeric_dtype(new_df[c])][:4]
         for i in range(min(len(numeric_old), len(numeric_new))):
             col_pairs.append((numeric_old[i], numeric_new[i]))
-    all_keys = sorted(set(old_df.index) | set(new_df.index))
-    out_rows = []
-    for key in all_keys:
-        ind, typ = key
-        row_data = {"Indication": ind, "Type": typ}
-        for old_col, new_col in col_pairs:
-            metric = str(old_col)[:35].replace("12 months", "12mo").replace("6 months", "6mo")
-            try:
-                old_val = float(old_df.at[key, old_col]) if key in old_df.index and old_col in old_df.columns else 0.0
-                new_val = float(new_df.at[key, new_col]) if key in new_df.index and new_col in new_df.columns else 0.0
-            except (KeyError, TypeError, ValueError):
-                old_val, new_val = 0.0, 0.0
-            if pd.isna(old_val):
-                old_val = 0.0
-            if pd.isna(new_val):
-                new_val = 0.0
-            row_data[f"{metric}_old"] = old_val
-            row_data[f"{metric}_new"] = new_val
-            row_data[f"{metric}_change"] = new_val - old_val
-        out_rows.append(row_data)
-    df = pd.DataFrame(out_rows)
-    df = df.set_index(["Indication", "Type"])
-    return df
+    # Outer-align both frames on the sorted union of keys once, then compare whole columns
+    # (the same drug listed twice in one section gives a repeated key; collapse it first)
+    index = pd.MultiIndex.from_tuples(sorted(set(old_df.index) | set(new_df.index)), names=["Indication", "Type"])
+    old_al = _first_per_key(old_df).reindex(index)
+    new_al = _first_per_key(new_df).reindex(index)
+    zeros = np.zeros(len(index))
+    out = {}
+    for old_col, new_col in col_pairs:
+        metric = str(old_col)[:35].replace("12 months", "12mo").replace("6 months", "6mo")
+        # Missing keys/columns, blanks and unparseable cells all compare as 0.0
+        old_vals = pd.to_numeric(old_al[old_col], errors="coerce").fillna(0.0).to_numpy(dtype=float) if old_col in old_al.columns else zeros
+        new_vals = pd.to_numeric(new_al[new_col], errors="coerce").fillna(0.0).to_numpy(dtype=float) if new_col in new_al.columns else zeros
+        out[f"{metric}_old"] = old_vals
+        out[f"{metric}_new"] = new_vals
+        out[f"{metric}_change"] = new_vals - old_vals
+    return pd.DataFrame(out, index=index)
+
+
+# Canonical overview metrics -> (Old header keyword, New header keyword) used to pair columns
+OVERVIEW_METRIC_KEYS = {
+    "total": ("Total", "Total"),
+    "newly_diagnosed": ("Newly diagnosed patients received", "Newly diagnosed"),
+    "follow_up": ("Follow up patients and received", "Follow up received"),
+    "active": ("Active patients", "Active patients"),
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _overview_col_pairs(old_cols: tuple, new_cols: tuple) -> tuple:
+    """
+    (old_col, new_col) pairs in OVERVIEW_METRIC_KEYS order: the first Old header containing the
+    Old keyword, paired with the first New header containing either keyword.
+    The headers only change when the workbook layout does, so the substring search runs once per layout.
+    """
+    old_strs = [str(c) for c in old_cols]
+    new_strs = [str(c) for c in new_cols]
+    pairs = []
+    for ok, nk in OVERVIEW_METRIC_KEYS.values():
+        oi = next((i for i, s in enumerate(old_strs) if ok in s), None)
+        if oi is None:
+            continue
+        ni = next((i for i, s in enumerate(new_strs) if nk in s or ok in s), None)
+        if ni is not None:
+            pairs.append((old_cols[oi], new_cols[ni]))
+    return tuple(pairs)
 
 
 def compare_drugs(old_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
     """
     Head-to-head comparison: align drugs and compare matching metrics.
     """
-    # Find matching columns (same or similar metric names)
-    old_cols = list(old_df.columns)
-    new_cols = list(new_df.columns)
-    
-    # Map by position/keyword - common metrics between files
-    metric_keys = [
-        ("Total", "Total"),
-        ("Newly diagnosed patients received", "Newly diagnosed"),
-        ("Follow up patients and received", "Follow up received"),
-        ("Active patients", "Active patients"),
-    ]
-    
-    col_pairs = []
-    for ok, nk in metric_keys:
-        for oc in old_cols:
-            if ok in str(oc):
-                for nc in new_cols:
-                    if nk in str(nc) or (ok in str(nc)):
-                        col_pairs.append((oc, nc))
-                        break
-                break
+    # Find matching columns (same or similar metric names); cached per pair of header lists
+    col_pairs = list(_overview_col_pairs(tuple(old_df.columns), tuple(new_df.columns)))
     
     # If no keyword match, use positional: first N numeric columns
     if not col_pairs:
@@ -647,29 +746,25 @@ def compare_drugs(old_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
         for i in range(min(4, len(numeric_old), len(numeric_new))):
             col_pairs.append((numeric_old[i], numeric_new[i]))
     
-    # All drugs (union)
-    all_drugs = sorted(set(old_df.index) | set(new_df.index))
-    
+    # All drugs (union), outer-aligned once; each metric is then a whole-column subtraction
+    index = pd.Index(sorted(set(old_df.index) | set(new_df.index)), name="Drug")
+    old_al = _first_per_key(old_df).reindex(index)
+    new_al = _first_per_key(new_df).reindex(index)
+
     # Build comparison
-    rows = []
-    for drug in all_drugs:
-        row_data = {"Drug": drug}
-        for old_col, new_col in col_pairs:
-            if old_col not in old_df.columns or new_col not in new_df.columns:
-                continue
-            metric = str(old_col)[:40].replace("Total patients treated in the last 12 months", "Total").replace("Total patients treated in the last 6 months", "Total")
-            old_val = old_df.loc[drug, old_col] if drug in old_df.index else np.nan
-            new_val = new_df.loc[drug, new_col] if drug in new_df.index else np.nan
-            old_val = float(old_val) if pd.notna(old_val) else 0.0
-            new_val = float(new_val) if pd.notna(new_val) else 0.0
-            
-            row_data[f"{metric}_old"] = old_val
-            row_data[f"{metric}_new"] = new_val
-            row_data[f"{metric}_change"] = new_val - old_val
-        
-        rows.append(row_data)
-    
-    return pd.DataFrame(rows).set_index("Drug")
+    out = {}
+    for old_col, new_col in col_pairs:
+        if old_col not in old_df.columns or new_col not in new_df.columns:
+            continue
+        metric = str(old_col)[:40].replace("Total patients treated in the last 12 months", "Total").replace("Total patients treated in the last 6 months", "Total")
+        old_vals = old_al[old_col].astype(float).fillna(0.0).to_numpy()
+        new_vals = new_al[new_col].astype(float).fillna(0.0).to_numpy()
+
+        out[f"{metric}_old"] = old_vals
+        out[f"{metric}_new"] = new_vals
+        out[f"{metric}_change"] = new_vals - old_vals
+
+    return pd.DataFrame(out, index=index)
 
 
 # McKinsey Elite style palette (exported for app.py)
@@ -703,14 +798,109 @@ def _mckinsey_style(ax, title: str = ""):
         ax.set_title(title, fontsize=12, fontweight=600, color=M["charcoal"], pad=12)
 
 
-def create_visualizations(comp_df: pd.DataFrame, output_dir: str = "."):
-    """Create McKinsey-style bar charts: old vs new per drug, and change per drug."""
+# Manufacturer suffixes dropped from chart labels
+_MANUFACTURER_SUFFIX_RE = re.compile(r"\((?:Pfizer|Novo Nordisk|Merck|Sandoz)\)")
+
+
+def _chart_fonts():
+    """Font stack for every chart; set in whichever process does the rendering."""
+    matplotlib.rcParams["font.family"] = "sans-serif"
+    matplotlib.rcParams["font.sans-serif"] = ["Helvetica Neue", "Arial", "DejaVu Sans"]
+
+
+# Chart renderers are top-level functions over plain arrays/lists so a process pool can pickle them.
+# Each figure is laid out once at draw time (layout="tight"), so savefig needs no
+# bbox_inches="tight" re-draw to fit the rotated labels.
+
+def _render_total_chart(old_vals: np.ndarray, new_vals: np.ndarray, drug_labels: list[str], path: str):
+    """Chart 1: total patients per drug, prior vs current side by side."""
+    _chart_fonts()
+    M = MCKINSEY_STYLE
+    x = np.arange(len(drug_labels))
+    w = 0.36
+    fig, ax = plt.subplots(figsize=(12, 6), layout="tight")
+    fig.patch.set_facecolor(M["bg"])
+    ax.bar(x - w/2, old_vals, w, label="Prior period (12 mo)", color=M["navy"], alpha=0.92, rasterized=True)
+    ax.bar(x + w/2, new_vals, w, label="Current period (6 mo)", color=M["teal"], alpha=0.92, rasterized=True)
+    ax.set_ylabel("Patients", fontsize=11, color=M["text"])
+    _mckinsey_style(ax, "Total patients by drug — prior vs current period")
+    ax.set_xticks(x)
+    ax.set_xticklabels(drug_labels, rotation=45, ha="right", fontsize=10)
+    ax.legend(frameon=False, fontsize=10, loc="upper right")
+    fig.savefig(path, dpi=150, facecolor=M["bg"])
+    plt.close(fig)
+
+
+def _render_change_chart(changes: np.ndarray, drug_labels: list[str], path: str):
+    """Chart 2: change (delta) in total patients per drug, green up / red down."""
+    _chart_fonts()
+    M = MCKINSEY_STYLE
+    fig, ax = plt.subplots(figsize=(10, 6), layout="tight")
+    fig.patch.set_facecolor(M["bg"])
+    colors = np.where(changes >= 0, M["increase"], M["decrease"]).tolist()
+    ax.barh(drug_labels, changes, color=colors, alpha=0.9, height=0.6, rasterized=True)
+    ax.axvline(x=0, color=M["charcoal"], linewidth=1.2)
+    ax.set_xlabel("Δ Patients (current − prior)", fontsize=11, color=M["text"])
+    _mckinsey_style(ax, "Change in total patients by drug")
+    ax.xaxis.grid(True, color=M["grid"], linestyle="-", linewidth=0.8)
+    fig.savefig(path, dpi=150, facecolor=M["bg"])
+    plt.close(fig)
+
+
+def _render_metrics_bars(block: np.ndarray, titles: list[str], drug_labels: list[str], path: str):
+    """Chart 3 (default): 2x2 grid of prior/current bars; block columns alternate old/new per metric."""
+    _chart_fonts()
+    M = MCKINSEY_STYLE
+    x = np.arange(len(drug_labels))
+    w = 0.36
+    fig, axes = plt.subplots(2, 2, figsize=(16, 11), layout="tight")
+    fig.patch.set_facecolor(M["bg"])
+    axes = axes.flatten()
+    for idx, title in enumerate(titles):
+        ax = axes[idx]
+        ax.bar(x - w/2, block[:, 2 * idx], w, label="Prior", color=M["navy"], alpha=0.92, rasterized=True)
+        ax.bar(x + w/2, block[:, 2 * idx + 1], w, label="Current", color=M["teal"], alpha=0.92, rasterized=True)
+        _mckinsey_style(ax, title)
+        ax.set_xticks(x)
+        ax.set_xticklabels(drug_labels, rotation=45, ha="right", fontsize=9)
+        ax.legend(frameon=False, fontsize=9, loc="upper left")
+    fig.savefig(path, dpi=150, facecolor=M["bg"])
+    plt.close(fig)
+
+
+def _render_metrics_heatmap(mat: np.ndarray, metric_labels: list[str], drug_labels: list[str], path: str):
+    """Chart 3 (--heatmap): one imshow of drugs x (metric, period), values already scaled to 0..1."""
+    _chart_fonts()
+    M = MCKINSEY_STYLE
+    fig, ax = plt.subplots(figsize=(max(10, 1.1 * len(metric_labels)), max(5, 0.5 * len(drug_labels) + 3)), layout="tight")
+    fig.patch.set_facecolor(M["bg"])
+    im = ax.imshow(mat, aspect="auto", cmap="BuPu", vmin=0, vmax=1)
+    ax.set_xticks(np.arange(len(metric_labels)))
+    ax.set_xticklabels(metric_labels, rotation=45, ha="right", fontsize=8)
+    ax.set_yticks(np.arange(len(drug_labels)))
+    ax.set_yticklabels(drug_labels, fontsize=9)
+    ax.set_title("Metrics by drug — prior vs current (scaled per metric)", fontsize=12, fontweight=600, color=M["charcoal"], pad=12)
+    fig.colorbar(im, ax=ax, fraction=0.03, pad=0.02)
+    fig.savefig(path, dpi=150, facecolor=M["bg"])
+    plt.close(fig)
+
+
+def _run_chart(job):
+    """Unpack one (renderer, args) job; the single callable a process pool maps over."""
+    fn, args = job
+    fn(*args)
+
+
+def create_visualizations(comp_df: pd.DataFrame, output_dir: str = ".", heatmap: bool = False):
+    """
+    Create McKinsey-style bar charts: old vs new per drug, and change per drug.
+    heatmap=True draws the multi-metric chart as one imshow (drugs x metric/period) when there are 4+ metrics.
+    The charts are independent, so when there is more than one they render in parallel worker processes.
+    """
     if not HAS_MATPLOTLIB:
         print("Skipping visualizations: matplotlib not installed. Run: pip install matplotlib")
         return
     output_dir = Path(output_dir)
-    matplotlib.rcParams["font.family"] = "sans-serif"
-    matplotlib.rcParams["font.sans-serif"] = ["Helvetica Neue", "Arial", "DejaVu Sans"]
     
     # Get metric columns
     old_cols = [c for c in comp_df.columns if c.endswith("_old")]
@@ -727,96 +917,223 @@ def create_visualizations(comp_df: pd.DataFrame, output_dir: str = "."):
     if not metrics:
         return
     
-    drugs = [d for d in comp_df.index if comp_df.loc[d, old_cols + new_cols].notna().any()]
+    drugs = comp_df.index[comp_df[old_cols + new_cols].notna().any(axis=1).to_numpy()].tolist()
     if not drugs:
         drugs = comp_df.index.tolist()
+    # Chart rows aligned once; every series below is a column slice of this frame.
+    # Plotted values are float32: exact for integer counts below 2**24 and ~7 significant digits
+    # otherwise, far finer than a bar height can show, at half the bytes pickled to render workers
+    sub = comp_df.reindex(drugs).fillna(0)
     
-    def short_name(d):
-        s = str(d).replace("(Pfizer)", "").replace("(Novo Nordisk)", "").replace("(Merck)", "").replace("(Sandoz)", "").strip()
-        return s[:20] if len(s) > 20 else s
+    # Axis labels: manufacturer suffix dropped, capped at 20 characters (one vectorized pass)
+    drug_labels = (
+        pd.Series(drugs, dtype=object).astype(str)
+        .str.replace(_MANUFACTURER_SUFFIX_RE, "", regex=True)
+        .str.strip().str.slice(0, 20).tolist()
+    )
     
-    drug_labels = [short_name(d) for d in drugs]
+    # All data is gathered here in the parent; each job is (renderer, picklable args)
+    jobs = []
     
     # Chart 1: Old vs New side-by-side (McKinsey style)
     total_old = next((c for c in old_cols if "Total" in c), old_cols[0] if old_cols else None)
     total_new = next((c for c in new_cols if "Total" in c), new_cols[0] if new_cols else None)
     
     if total_old and total_new:
-        fig, ax = plt.subplots(figsize=(12, 6))
-        fig.patch.set_facecolor(MCKINSEY_STYLE["bg"])
-        x = np.arange(len(drugs))
-        w = 0.36
-        
-        old_vals = [comp_df.loc[d, total_old] if d in comp_df.index else 0 for d in drugs]
-        new_vals = [comp_df.loc[d, total_new] if d in comp_df.index else 0 for d in drugs]
-        old_vals = [v if pd.notna(v) else 0 for v in old_vals]
-        new_vals = [v if pd.notna(v) else 0 for v in new_vals]
-        
-        ax.bar(x - w/2, old_vals, w, label="Prior period (12 mo)", color=MCKINSEY_STYLE["navy"], alpha=0.92)
-        ax.bar(x + w/2, new_vals, w, label="Current period (6 mo)", color=MCKINSEY_STYLE["teal"], alpha=0.92)
-        ax.set_ylabel("Patients", fontsize=11, color=MCKINSEY_STYLE["text"])
-        _mckinsey_style(ax, "Total patients by drug — prior vs current period")
-        ax.set_xticks(x)
-        ax.set_xticklabels(drug_labels, rotation=45, ha="right", fontsize=10)
-        ax.legend(frameon=False, fontsize=10, loc="upper right")
-        plt.tight_layout()
-        plt.savefig(output_dir / "drug_total_comparison.png", dpi=150, bbox_inches="tight", facecolor=MCKINSEY_STYLE["bg"])
-        plt.close()
+        # Both series as one contiguous (drugs x 2) float32 block, unpacked column-wise
+        old_vals, new_vals = sub[[total_old, total_new]].to_numpy(dtype=np.float32).T
+        jobs.append((_render_total_chart, (old_vals, new_vals, drug_labels, str(output_dir / "drug_total_comparison.png"))))
     
     # Chart 2: Change (delta) per drug
     change_cols = [c for c in comp_df.columns if c.endswith("_change")]
     if change_cols:
         ch_col = next((c for c in change_cols if "Total" in c), change_cols[0])
-        changes = [comp_df.loc[d, ch_col] if d in comp_df.index else np.nan for d in drugs]
-        changes = [c if pd.notna(c) else 0 for c in changes]
-        
-        fig2, ax2 = plt.subplots(figsize=(10, 6))
-        fig2.patch.set_facecolor(MCKINSEY_STYLE["bg"])
-        colors = [MCKINSEY_STYLE["increase"] if c >= 0 else MCKINSEY_STYLE["decrease"] for c in changes]
-        ax2.barh(drug_labels, changes, color=colors, alpha=0.9, height=0.6)
-        ax2.axvline(x=0, color=MCKINSEY_STYLE["charcoal"], linewidth=1.2)
-        ax2.set_xlabel("Δ Patients (current − prior)", fontsize=11, color=MCKINSEY_STYLE["text"])
-        _mckinsey_style(ax2, "Change in total patients by drug")
-        ax2.xaxis.grid(True, color=MCKINSEY_STYLE["grid"], linestyle="-", linewidth=0.8)
-        plt.tight_layout()
-        plt.savefig(output_dir / "drug_change_by_drug.png", dpi=150, bbox_inches="tight", facecolor=MCKINSEY_STYLE["bg"])
-        plt.close()
+        changes = sub[ch_col].to_numpy(dtype=np.float32)
+        jobs.append((_render_change_chart, (changes, drug_labels, str(output_dir / "drug_change_by_drug.png"))))
     
     # Chart 3: Multi-metric comparison
-    if len(metrics) >= 2:
-        fig3, axes = plt.subplots(2, 2, figsize=(16, 11))
-        fig3.patch.set_facecolor(MCKINSEY_STYLE["bg"])
-        axes = axes.flatten()
-        for idx, (base, oc, nc) in enumerate(metrics[:4]):
-            ax = axes[idx]
-            old_vals = [comp_df.loc[d, oc] if d in comp_df.index else 0 for d in drugs]
-            new_vals = [comp_df.loc[d, nc] if d in comp_df.index else 0 for d in drugs]
-            old_vals = [v if pd.notna(v) else 0 for v in old_vals]
-            new_vals = [v if pd.notna(v) else 0 for v in new_vals]
-            
-            x = np.arange(len(drugs))
-            w = 0.36
-            ax.bar(x - w/2, old_vals, w, label="Prior", color=MCKINSEY_STYLE["navy"], alpha=0.92)
-            ax.bar(x + w/2, new_vals, w, label="Current", color=MCKINSEY_STYLE["teal"], alpha=0.92)
-            _mckinsey_style(ax, str(base).replace("Total patients treated in the last 12 months", "Total patients")[:45])
-            ax.set_xticks(x)
-            ax.set_xticklabels(drug_labels, rotation=45, ha="right", fontsize=9)
-            ax.legend(frameon=False, fontsize=9, loc="upper left")
-        # Increase spacing between subplots
-        plt.subplots_adjust(hspace=0.35, wspace=0.25)
-        plt.savefig(output_dir / "drug_metrics_comparison.png", dpi=150, bbox_inches="tight", facecolor=MCKINSEY_STYLE["bg"])
-        plt.close()
+    metrics_path = str(output_dir / "drug_metrics_comparison.png")
+    if heatmap and len(metrics) >= 4:
+        # Single image instead of four bar grids: (drugs x metrics x [prior, current]), each metric
+        # scaled by its own max over both periods so prior and current stay comparable
+        old_arr = sub[[oc for _, oc, _ in metrics]].to_numpy(dtype=np.float32)
+        new_arr = sub[[nc for _, _, nc in metrics]].to_numpy(dtype=np.float32)
+        mat = np.stack([old_arr, new_arr], axis=-1)
+        scale = np.abs(mat).max(axis=(0, 2), keepdims=True)
+        mat = np.divide(mat, scale, out=np.zeros_like(mat), where=scale > 0)
+        metric_labels = [
+            f"{str(base).replace('Total patients treated in the last 12 months', 'Total patients')[:25]} · {period}"
+            for base, _, _ in metrics for period in ("Prior", "Current")
+        ]
+        jobs.append((_render_metrics_heatmap, (mat.reshape(len(drugs), -1), metric_labels, drug_labels, metrics_path)))
+    elif len(metrics) >= 2:
+        # One gather for all plotted metrics: columns alternate old/new per metric
+        shown = metrics[:4]
+        block = sub[[c for _, oc, nc in shown for c in (oc, nc)]].to_numpy(dtype=np.float32)
+        titles = [str(base).replace("Total patients treated in the last 12 months", "Total patients")[:45] for base, _, _ in shown]
+        jobs.append((_render_metrics_bars, (block, titles, drug_labels, metrics_path)))
+    
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers > 1:
+        # Agg rasterization holds the GIL, so separate processes (not threads) render side by side
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_run_chart, jobs))
+    else:
+        for job in jobs:
+            _run_chart(job)
+
+
+# Below this many rows in total xlsxwriter via to_excel is fast enough; above it main() streams rows
+FAST_WRITE_MIN_ROWS = 1000
+
+
+def _index_columns(index: pd.Index) -> list:
+    """
+    Index level values per output column, laid out as to_excel shows them: an outer MultiIndex level
+    appears only on the first row of each run (to_excel merges those cells), repeats are None (blank).
+    """
+    levels = [index.get_level_values(k) for k in range(index.nlevels)]
+    if index.nlevels < 2:
+        return levels
+    values = [lv.tolist() for lv in levels]
+    outer = [list(v) for v in values[:-1]]
+    for r in range(1, len(index)):
+        for k in range(len(outer)):
+            if values[k][r] != values[k][r - 1]:
+                break
+            outer[k][r] = None
+    return [*outer, levels[-1]]
+
+
+def _sheet_rows(df: pd.DataFrame):
+    """Data rows as tuples (index levels first, grouped as in _index_columns) for row-by-row writers."""
+    return zip(*_index_columns(df.index), *(df.iloc[:, j].tolist() for j in range(df.shape[1])))
+
+
+def _write_sheets_fast(path: str, sheets: dict[str, pd.DataFrame]) -> None:
+    """
+    Write each DataFrame (index included) to its own sheet with openpyxl's write-only workbook:
+    rows are streamed straight to the sheet XML without per-cell style objects.
+    MultiIndex levels get one column each (outer levels blank on repeats, as to_excel merges them); headers are bold.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    bold = Font(bold=True)
+    for sheet_name, df in sheets.items():
+        ws = wb.create_sheet(sheet_name)
+        # Column widths must be set before the first row is streamed
+        ws.column_dimensions["A"].width = 32
+        for c in range(2, 27):
+            ws.column_dimensions[get_column_letter(c)].width = 14
+        if df.empty and len(df.columns) == 0:
+            continue
+        header = [n if n is not None else "" for n in df.index.names] + [str(c) for c in df.columns]
+        header_cells = []
+        for h in header:
+            cell = WriteOnlyCell(ws, value=h)
+            cell.font = bold
+            header_cells.append(cell)
+        ws.append(header_cells)
+        for row in _sheet_rows(df):
+            ws.append(row)
+    wb.save(path)
+
+
+def _sheet_xml(df: pd.DataFrame) -> str:
+    """
+    Worksheet XML for one DataFrame (index levels first, plain header row, inline strings),
+    built as plain text: one formatted string per row instead of a cell object per value.
+    """
+    from xml.sax.saxutils import escape
+    from openpyxl.utils import get_column_letter
+
+    columns = [*_index_columns(df.index), *(df.iloc[:, j] for j in range(df.shape[1]))]
+    header = [n if n is not None else "" for n in df.index.names] + [str(c) for c in df.columns]
+    letters = [get_column_letter(c) for c in range(1, len(columns) + 1)]
+
+    def _text(ref: str, v) -> str:
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(str(v))}</t></is></c>'
+
+    # Format every column as a whole: numeric columns via one astype(str), the rest as inline strings
+    body_cols = []
+    for letter, col in zip(letters, columns):
+        refs = [f"{letter}{r}" for r in range(2, len(df) + 2)]
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            vals = np.asarray(col, dtype=float).astype(str)
+            body_cols.append([f'<c r="{ref}"><v>{v}</v></c>' for ref, v in zip(refs, vals)])
+        else:
+            body_cols.append([_text(ref, v) if v is not None else "" for ref, v in zip(refs, col)])
+    rows = ['<row r="1">' + "".join(_text(f"{letter}1", h) for letter, h in zip(letters, header)) + "</row>"]
+    rows += [f'<row r="{r}">' + "".join(cells) + "</row>" for r, cells in enumerate(zip(*body_cols), start=2)]
+    cols = '<cols><col min="1" max="1" width="32" customWidth="1"/><col min="2" max="26" width="14" customWidth="1"/></cols>'
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        f"{cols}<sheetData>{''.join(rows)}</sheetData></worksheet>"
+    )
+
+
+def _replace_sheet_xml(path: str, sheet_number: int, df: pd.DataFrame) -> None:
+    """Swap xl/worksheets/sheet<N>.xml inside a saved workbook for _sheet_xml(df), via a temp copy of the zip."""
+    import shutil
+    import tempfile
+    import zipfile
+
+    part = f"xl/worksheets/sheet{sheet_number}.xml"
+    abs_path = os.path.abspath(path)
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(abs_path) or ".")
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(abs_path) as src, zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as dst:
+            for item in src.infolist():
+                if item.filename == part:
+                    dst.writestr(item, _sheet_xml(df))
+                else:
+                    dst.writestr(item, src.read(item.filename))
+        # mkstemp creates the file 0600; keep the workbook's own permissions across the swap
+        shutil.copymode(abs_path, tmp_path)
+        os.replace(tmp_path, abs_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _combined_data(parts: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Stack the Prior/Current frames into one long frame indexed by dataset: each frame's index levels
+    become leading columns (Drug, or Indication/Type) and metric columns are unioned across datasets.
+    Key columns a dataset lacks are left blank; missing metrics are 0.
+    """
+    frames = {k: df.reset_index() for k, df in parts.items() if not df.empty}
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames, names=["dataset"]).droplevel(1)
+    keys = list(dict.fromkeys(n for df in parts.values() if not df.empty for n in df.index.names if n is not None))
+    combined[keys] = combined[keys].fillna("")
+    return combined.fillna(0)
 
 
 def main():
     import sys
     
-    if len(sys.argv) < 3:
-        print("Usage: python drug_comparison.py <old_file.xlsx> <new_file.xlsx>")
+    # --fast-xml: write the Details Comparison sheet as hand-built XML (for very large details sheets)
+    # --heatmap: draw the multi-metric chart as a single heatmap instead of a 2x2 bar grid
+    # --slim: one "Data" sheet (with a dataset column) instead of the four Prior/Current sheets
+    fast_xml = "--fast-xml" in sys.argv[1:]
+    heatmap = "--heatmap" in sys.argv[1:]
+    slim = "--slim" in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a not in ("--fast-xml", "--heatmap", "--slim")]
+    if len(args) < 2:
+        print("Usage: python drug_comparison.py <old_file.xlsx> <new_file.xlsx> [--fast-xml] [--heatmap] [--slim]")
         sys.exit(1)
     
-    old_path = sys.argv[1]
-    new_path = sys.argv[2]
+    old_path = args[0]
+    new_path = args[1]
     
     if not Path(old_path).exists():
         print(f"Error: Old file not found: {old_path}")
@@ -847,30 +1164,61 @@ def main():
     
     # Save Excel with both sheet comparisons (NaN → 0)
     output_excel = "drug_comparison_head_to_head.xlsx"
-    with pd.ExcelWriter(output_excel, engine="xlsxwriter") as writer:
-        comp_overview.fillna(0).to_excel(writer, sheet_name="Overview Comparison")
-        comp_details.fillna(0).to_excel(writer, sheet_name="Details Comparison")
-        old_overview.fillna(0).to_excel(writer, sheet_name="Overview Prior")
-        new_overview.fillna(0).to_excel(writer, sheet_name="Overview Current")
+    details_sheet = comp_details.fillna(0)
+    # --fast-xml: the writer only lays down an empty placeholder sheet; its XML is swapped in afterwards
+    swap_details = fast_xml and not details_sheet.empty
+    sheets = {
+        "Overview Comparison": comp_overview.fillna(0),
+        "Details Comparison": pd.DataFrame() if swap_details else details_sheet,
+    }
+    if slim:
+        sheets["Data"] = _combined_data({
+            "overview_prior": old_overview, "overview_current": new_overview,
+            "details_prior": old_details, "details_current": new_details,
+        })
+    else:
+        sheets["Overview Prior"] = old_overview.fillna(0)
+        sheets["Overview Current"] = new_overview.fillna(0)
         if not old_details.empty:
-            old_details.fillna(0).to_excel(writer, sheet_name="Details Prior")
+            sheets["Details Prior"] = old_details.fillna(0)
         if not new_details.empty:
-            new_details.fillna(0).to_excel(writer, sheet_name="Details Current")
-        
-        header_fmt = writer.book.add_format({
-            "bold": True, "font_size": 11, "font_color": "#1a365d",
-            "bottom": 2, "bottom_color": "#2d3748",
-        })
-        for sheet_name, ws in writer.sheets.items():
-            ws.set_column("A:A", 32)
-            ws.set_column("B:Z", 14)
+            sheets["Details Current"] = new_details.fillna(0)
+    if sum(len(df) for df in sheets.values()) >= FAST_WRITE_MIN_ROWS:
+        _write_sheets_fast(output_excel, sheets)
+    else:
+        # constant_memory flushes each row to disk once written, so every sheet is written
+        # strictly row by row (to_excel emits cells column by column and cannot be used here)
+        with pd.ExcelWriter(
+            output_excel, engine="xlsxwriter",
+            engine_kwargs={"options": {"constant_memory": True, "strings_to_numbers": False}},
+        ) as writer:
+            header_fmt = writer.book.add_format({
+                "bold": True, "font_size": 11, "font_color": "#1a365d",
+                "bottom": 2, "bottom_color": "#2d3748",
+            })
+            for sheet_name, df in sheets.items():
+                ws = writer.book.add_worksheet(sheet_name)
+                writer.sheets[sheet_name] = ws
+                ws.set_column("A:A", 32)
+                ws.set_column("B:Z", 14)
+                if df.empty and len(df.columns) == 0:
+                    continue
+                # Raw tuples straight to xlsxwriter; an outer index level is written once per group
+                # (merge_range would touch rows constant_memory has not reached yet)
+                header = [n if n is not None else "" for n in df.index.names] + [str(c) for c in df.columns]
+                ws.write_row(0, 0, header, header_fmt)
+                for r, row in enumerate(_sheet_rows(df), start=1):
+                    ws.write_row(r, 0, row)
+    if swap_details:
+        # Both writers name sheet parts by position; Details Comparison is the second sheet
+        _replace_sheet_xml(output_excel, list(sheets).index("Details Comparison") + 1, details_sheet)
     
     print(f"\nComparisons saved to: {output_excel}")
-    print("  Sheets: Overview Comparison, Details Comparison, Overview Prior/Current, Details Prior/Current")
+    print("  Sheets: " + ", ".join(sheets))
     
     # Visualizations (overview only)
     print("Creating visualizations (overview)...")
-    create_visualizations(comp_overview)
+    create_visualizations(comp_overview, heatmap=heatmap)
     if HAS_MATPLOTLIB:
         print("Charts saved: drug_total_comparison.png, drug_change_by_drug.png, drug_metrics_comparison.png")
     
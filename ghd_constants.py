@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Shared GHD drug constants. Kept free of pandas/numpy/matplotlib imports so light
+Streamlit pages can read the drug list without loading drug_comparison.
+"""
+
+# Canonical list of GHD drugs (growth hormone deficiency medications) for calculators/forms
+GHD_DRUGS = [
+    "Genotropin (Pfizer)",
+    "Norditropin (Novo Nordisk)",
+    "Nutropin (Genentech)",
+    "Omnitrope (Sandoz)",
+    "Saizen (Merck Serono)",
+    "Humatrope (Eli Lilly)",
+    "Ngenla (Pfizer)",
+    "Zomacton (Ferring)",
+]
@@ -6,7 +6,8 @@ Uses the same drug list as the GHD Drug Comparison project.
 """
 
 import streamlit as st
-from drug_comparison import GHD_DRUGS
+# Constants-only module: importing drug_comparison here would pull in pandas/numpy/matplotlib on every rerun
+from ghd_constants import GHD_DRUGS
 
 st.set_page_config(
     page_title="Medication Calculator | GHD",
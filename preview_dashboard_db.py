@@ -3,6 +3,7 @@
 Preview sample data from dashboard.db. Run: python preview_dashboard_db.py
 """
 
+import io
 import sqlite3
 import sys
 from pathlib import Path
@@ -16,26 +17,31 @@ def main():
         print("Run: python seed_dashboard_db.py")
         sys.exit(1)
     conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
     cur = conn.cursor()
     cur.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
     tables = [r[0] for r in cur.fetchall()]
     for table in tables:
-        cur.execute(f"SELECT * FROM [{table}] LIMIT 10")
+        # Build each table's block in memory and hand it to stdout in a single write
+        buf = io.StringIO()
+        # One row past the preview tells whether the table has more without counting it
+        cur.execute(f"SELECT * FROM [{table}] LIMIT 11")
+        # Plain tuples; column names come from the cursor, not from per-row sqlite3.Row lookups
+        cols = [d[0] for d in cur.description]
         rows = cur.fetchall()
         if not rows:
-            print(f"\n--- {table} (0 rows) ---\n")
+            sys.stdout.write(f"\n--- {table} (0 rows) ---\n\n")
             continue
-        cols = list(rows[0].keys())
-        print(f"\n--- {table} (sample, up to 10 rows) ---")
-        print("  " + " | ".join(cols))
-        print("  " + "-" * (sum(len(c) for c in cols) + 3 * (len(cols) - 1)))
-        for row in rows:
-            print("  " + " | ".join(str(row[c])[:20] for c in cols))
-        cur.execute(f"SELECT COUNT(*) FROM [{table}]")
-        n = cur.fetchone()[0]
-        if n > 10:
-            print(f"  ... and {n - 10} more rows (total {n})")
+        print(f"\n--- {table} (sample, up to 10 rows) ---", file=buf)
+        print("  " + " | ".join(cols), file=buf)
+        print("  " + "-" * (sum(len(c) for c in cols) + 3 * (len(cols) - 1)), file=buf)
+        for row in rows[:10]:
+            print("  " + " | ".join(str(v)[:20] for v in row), file=buf)
+        if len(rows) > 10:
+            # Full COUNT(*) scan only for tables that actually overflow the preview
+            cur.execute(f"SELECT COUNT(*) FROM [{table}]")
+            n = cur.fetchone()[0]
+            print(f"  ... and {n - 10} more rows (total {n})", file=buf)
+        sys.stdout.write(buf.getvalue())
     conn.close()
     print()
 